@@ -1,81 +1,39 @@
 import streamlit as st
-import pandas as pd
-from utils import load_all_sessions
-from datetime import datetime
+from utils import (
+    load_all_sessions, home_summary, GENDER_LABELS, HOME_METRICS, GRADE_BANDS,
+    is_offseason, session_issues, start_profile, timed, debug_panel, live_updates,
+)
+from datetime import datetime, date
 
 st.title("📊 Performance Dashboard")
+start_profile("Home")
+live_updates()
 
 # -------------------------------
-# Load and preprocess data
+# Load data (already normalized by utils)
 # -------------------------------
 data, files = load_all_sessions()
 if data.empty:
     st.warning("No data found.")
     st.stop()
 
-# Normalize
-data["gender"] = data["gender"].str.strip().str.lower().map({
-    "m": "male", "male": "male",
-    "f": "female", "female": "female"
-})
-data["grade"] = pd.to_numeric(data["grade"], errors="coerce")
-data["date"] = pd.to_datetime(data["date"], errors="coerce")
-data["month_year"] = data["date"].dt.strftime("%B-%Y")
-data["year"] = data["date"].dt.year
+# Rows that didn't match the data format are still loaded; list them here
+# so they get fixed in the CSVs.
+issues = session_issues()
+if not issues.empty:
+    with st.expander(f"⚠️ {len(issues)} problem(s) in the session files"):
+        st.dataframe(issues, use_container_width=True, hide_index=True)
 
 # Metrics of interest
-preferred_metrics = [
-    "Max-Velocity (All Metrics)",
-    "10m Acceleration",
-    "Vertical Jump",
-    "Triple Broad Jump",
-    "Standing Triple Jump",
-    "24/28s Drill"
-]
-
-grade_bands = {
-    "Overall (9–12)": [9, 10, 11, 12],
-    "Freshman (9)": [9],
-    "Fresh-Soph (9–10)": [9, 10]
-}
+preferred_metrics = HOME_METRICS
+grade_bands = GRADE_BANDS
 
 current_year = datetime.now().year
-season_data = data[data["year"] == current_year]
-
-# -------------------------------
-# Helper: best performance
-# -------------------------------
-def best_performance(df, metric_label, grade_filter=None):
-    if metric_label == "Max-Velocity (All Metrics)":
-        subset = df[df["metric_family"].str.lower() == "maxv"].copy()
-    else:
-        subset = df[df["metric_name"] == metric_label].copy()
-
-    if grade_filter:
-        subset = subset[subset["grade"].isin(grade_filter)]
-    if subset.empty:
-        return None
-
-    # Determine direction
-    display_unit = subset["display_unit"].dropna().iloc[0].lower()
-    ascending = display_unit in ["s", "sec", "seconds"]
 
-    grouped = subset.loc[
-        subset.groupby("athlete_name")["display_value"].idxmax()
-    ]
-
-    best = grouped.sort_values("display_value", ascending=ascending).iloc[0]
-
-    disp = f"{best['display_value']} {best['display_unit']}"
-    if best['input_unit'] != best['display_unit']:
-        disp += f" ({best['input_value']} {best['input_unit']})"
-
-    return {
-        "metric": metric_label,
-        "athlete": best["athlete_name"],
-        "value": disp,
-        "date": best["month_year"]
-    }
+# Every table below is precomputed once per data version and season; the
+# page just looks cells up.
+with timed("home summary"):
+    summary = home_summary(data, current_year)
 
 # -------------------------------
 # Section 1: All-Time Leaders
@@ -83,38 +41,18 @@ def best_performance(df, metric_label, grade_filter=None):
 st.header("🏆 All-Time Leaders")
 col_m, col_f = st.columns(2)
 
-for col, gender in zip([col_m, col_f], ["male", "female"]):
+for col, (gender, gender_label) in zip([col_m, col_f], GENDER_LABELS.items()):
     with col:
-        st.subheader(gender.capitalize())
+        st.subheader(gender_label)
         band_tabs = st.tabs(list(grade_bands.keys()))
-        for i, (label, grades) in enumerate(grade_bands.items()):
+        for i, label in enumerate(grade_bands):
             with band_tabs[i]:
-                gdf = data[data["gender"] == gender]
-
-                rows = []
-                for metric_label in preferred_metrics:
-                    res = best_performance(gdf, metric_label, grade_filter=grades)
-                    if res:
-                        rows.append([res["metric"], res["athlete"], res["value"], res["date"]])
-                    else:
-                        rows.append([metric_label, "—", "—", "—"])
-
-                df = pd.DataFrame(rows, columns=["Metric", "Athlete", "Value", "Date"])
-                st.table(df)
+                st.table(summary.leaders(gender, label))
 
 # -------------------------------
 # Detect offseason
 # -------------------------------
-from datetime import date
-
-today = date.today()
-year = today.year
-
-# Season runs from 2nd week of March (≈ March 8) to 2nd week of June (≈ June 14)
-season_start = date(year, 3, 10)   # adjust to your exact "second week" rule if needed
-season_end   = date(year, 6, 14)
-
-offseason = not (season_start <= today <= season_end)
+offseason = is_offseason(date.today())
 
 # -------------------------------
 # Year in Review Mode
@@ -122,34 +60,6 @@ offseason = not (season_start <= today <= season_end)
 if offseason:
     st.header(f"📅 Year in Review ({current_year})")
 
-    # Helper: Top 3 per metric
-    def top_performances(df, metric_label, grades):
-        if metric_label == "Max-Velocity (All Metrics)":
-            subset = df[df["metric_family"].str.lower() == "maxv"].copy()
-        else:
-            subset = df[df["metric_name"] == metric_label].copy()
-
-        subset = subset[subset["grade"].isin(grades)]
-        if subset.empty:
-            return pd.DataFrame(columns=["Athlete", "Value", "Date"])
-
-        display_unit = subset["display_unit"].dropna().iloc[0].lower()
-        ascending = display_unit in ["s", "sec", "seconds"]
-
-        grouped = subset.loc[
-            subset.groupby("athlete_name")["display_value"].idxmax()
-        ]
-
-        top3 = grouped.sort_values("display_value", ascending=ascending).head(3)
-        rows = []
-        for _, row in top3.iterrows():
-            val = f"{row['display_value']} {row['display_unit']}"
-            if row["input_unit"] != row["display_unit"]:
-                val += f" ({row['input_value']} {row['input_unit']})"
-            rows.append([row["athlete_name"], val, row["date"].strftime("%B-%Y")])
-
-        return pd.DataFrame(rows, columns=["Athlete", "Value", "Date"])
-
     # Two-column layout
     col_left, col_right = st.columns([2, 1])
 
@@ -159,16 +69,15 @@ if offseason:
     with col_left:
         st.subheader("🏅 Top Performances of the Season")
 
-        gender_tabs = st.tabs(["Male", "Female"])
-        for g_idx, gender in enumerate(["male", "female"]):
+        gender_tabs = st.tabs(list(GENDER_LABELS.values()))
+        for g_idx, gender in enumerate(GENDER_LABELS):
             with gender_tabs[g_idx]:
                 band_tabs = st.tabs(list(grade_bands.keys()))
-                for i, (label, grades) in enumerate(grade_bands.items()):
+                for i, label in enumerate(grade_bands):
                     with band_tabs[i]:
-                        gdf = season_data[season_data["gender"] == gender]
                         for metric_label in preferred_metrics:
                             st.markdown(f"**{metric_label}**")
-                            df = top_performances(gdf, metric_label, grades)
+                            df = summary.top(gender, label, metric_label)
                             if df.empty:
                                 st.info("No data")
                             else:
@@ -183,25 +92,10 @@ if offseason:
     # -------------------------------
     with col_right:
         st.subheader("📊 Participation")
-        counts = (
-            season_data.groupby("metric_name")["athlete_name"]
-            .nunique()
-            .reset_index()
-            .rename(columns={"athlete_name": "Unique Athletes"})
-            .sort_values("Unique Athletes", ascending=False)
-        )
-        st.table(counts)
+        st.table(summary.participation)
 
         st.subheader("⏱️ Consistency")
-        consistency = (
-            season_data.groupby("athlete_name")["date"]
-            .count()
-            .reset_index()
-            .rename(columns={"date": "Sessions"})
-            .sort_values("Sessions", ascending=False)
-            .head(10)
-        )
-        st.table(consistency)
+        st.table(summary.consistency)
 
 # -------------------------------
 # Section 2: Recent Session Highlights (In-Season)
@@ -209,51 +103,16 @@ if offseason:
 else:
     st.header("⏱️ Recent Session Highlights")
 
-    this_year = data[data["date"].dt.year == current_year]
-    if this_year.empty:
+    if not summary.has_season:
         st.info("No data available for the current year.")
     else:
-        latest_week = this_year["week_number"].max()
-        recent = this_year[this_year["week_number"] == latest_week]
-
-        # Figure out top metrics if preferred ones missing
-        metric_counts = recent["metric_name"].value_counts().to_dict()
-        selected_metrics = []
-        for m in preferred_metrics:
-            if m == "Max-Velocity (All Metrics)":
-                if not recent[recent["metric_family"].str.lower() == "maxv"].empty:
-                    selected_metrics.append(m)
-                else:
-                    if metric_counts:
-                        alt = max(metric_counts, key=metric_counts.get)
-                        selected_metrics.append(alt)
-                        metric_counts.pop(alt, None)
-            else:
-                if m in metric_counts:
-                    selected_metrics.append(m)
-                    metric_counts.pop(m, None)
-                else:
-                    if metric_counts:
-                        alt = max(metric_counts, key=metric_counts.get)
-                        selected_metrics.append(alt)
-                        metric_counts.pop(alt, None)
-
         col_m2, col_f2 = st.columns(2)
-        for col, gender in zip([col_m2, col_f2], ["male", "female"]):
+        for col, (gender, gender_label) in zip([col_m2, col_f2], GENDER_LABELS.items()):
             with col:
-                st.subheader(gender.capitalize())
+                st.subheader(gender_label)
                 band_tabs = st.tabs(list(grade_bands.keys()))
-                for i, (label, grades) in enumerate(grade_bands.items()):
+                for i, label in enumerate(grade_bands):
                     with band_tabs[i]:
-                        gdf = recent[recent["gender"] == gender]
-
-                        rows = []
-                        for metric_label in selected_metrics:
-                            res = best_performance(gdf, metric_label, grade_filter=grades)
-                            if res:
-                                rows.append([res["metric"], res["athlete"], res["value"], res["date"]])
-                            else:
-                                rows.append([metric_label, "—", "—", "—"])
+                        st.table(summary.highlights(gender, label))
 
-                        df = pd.DataFrame(rows, columns=["Metric", "Athlete", "Value", "Date"])
-                        st.table(df)
+debug_panel()
@@ -0,0 +1,250 @@
+"""Synthetic session data and a timing benchmark for the data pipeline.
+
+    python benchmark.py                          # 10k / 100k / 1M rows
+    python benchmark.py --rows 50000 --json bench.json
+    python benchmark.py --generate data/synthetic --rows 20000   # just write CSVs
+    python benchmark.py --generate data/synthetic --layout day   # ... one per training day
+
+Every stage calls the same utils functions the pages use, minus the
+Streamlit caches, so the numbers are the cold cost of one rerun.
+"""
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import streamlit as st
+import utils
+
+st.logger.set_log_level("error")   # bare mode; the page config/cache warnings are noise here
+
+# -------------------------------
+# Synthetic sessions
+# -------------------------------
+# (category, family, name, id, input unit, display unit, formula, typical input, spread)
+METRIC_CATALOG = [
+    ("Speed", "Acceleration", "10m Acceleration", "10010", "s", "s", "", 2.3, 0.15),
+    ("Speed", "Acceleration", "20m Acceleration", "10020", "s", "s", "", 3.7, 0.2),
+    ("Speed", "Acceleration", "40m Acceleration", "10040", "s", "s", "", 6.4, 0.35),
+    ("Speed", "MaxV", "10-20m Split", "11110", "s", "mph", "22.37 / value", 1.39, 0.12),
+    ("Speed", "MaxV", "20-30m Split", "11210", "s", "mph", "22.37 / value", 1.33, 0.12),
+    ("Speed", "MaxV", "30-40m Split", "11310", "s", "mph", "22.37 / value", 1.31, 0.12),
+    ("Speed", "MaxV", "10-30m Split", "11120", "s", "mph", "22.37 / (value / 2)", 2.61, 0.2),
+    ("X-Factor", "Jump", "Vertical Jump", "20100", "in", "in", "", 21.0, 4.0),
+    ("X-Factor", "Jump", "Triple Broad Jump", "20200", "ft", "m", "value / 3.281", 21.7, 3.0),
+    ("X-Factor", "Jump", "Standing Triple Jump", "20201", "ft", "m", "value / 3.281", 19.4, 3.0),
+    ("X-Factor", "Jump", "Seated Broad Jump", "20202", "ft", "in", "value * 12", 7.0, 1.0),
+    ("X-Factor", "RSI", "10-5_RSI", "", "RSI", "RSI", "", 2.8, 0.4),
+    ("Lactic", "Mens", "24/28s Drill", "30024", "m", "m", "", 180.0, 12.0),
+    ("Lactic", "4x4-Predict", "3x200_Avg", "30101", "s", "s", "", 31.5, 2.5),
+]
+CATALOG_COLUMNS = [
+    "metric_category", "metric_family", "metric_name", "metric_id",
+    "input_unit", "display_unit", "conversion_formula", "typical", "spread",
+]
+PHASES = ["Preparation", "Preseason", "Competition", "Championship"]
+DAYS = ["Monday", "Wednesday", "Friday"]
+SESSION_COLUMNS = [
+    "season_phase", "week_number", "day_in_week", "date", "metric_category", "metric_family",
+    "metric_name", "metric_id", "input_unit", "display_unit", "conversion_formula", "athlete_name",
+    "gender", "grade", "input_value", "display_value", "attempt_number", "notes",
+]
+
+def generate_sessions(rows, athletes=60, seasons=4, attempts=3, weeks=12, start_year=2022, seed=0):
+    """A frame of about `rows` attempts in the README session schema.
+
+    Each session is one athlete doing one metric on one training day, with
+    `attempts` attempts; values scatter around the catalog's typical input,
+    shifted by a per-athlete ability so leaderboards have a real spread.
+    """
+    rng = np.random.default_rng(seed)
+    catalog = pd.DataFrame(METRIC_CATALOG, columns=CATALOG_COLUMNS)
+    n_sessions = max(1, -(-rows // attempts))
+
+    names = np.array([f"Athlete-{i:03d}" for i in range(athletes)])
+    genders = np.where(np.arange(athletes) % 2 == 0, "M", "F")
+    first_grade = rng.integers(9, 13, size=athletes)
+    ability = rng.normal(0.0, 1.0, size=athletes)
+
+    athlete = rng.integers(0, athletes, size=n_sessions)
+    metric = rng.integers(0, len(catalog), size=n_sessions)
+    season = rng.integers(0, seasons, size=n_sessions)
+    week = rng.integers(1, weeks + 1, size=n_sessions)
+    day = rng.integers(0, len(DAYS), size=n_sessions)
+
+    # Seasons start on the second Monday of March.
+    season_start = pd.to_datetime([f"{start_year + s}-03-01" for s in range(seasons)])
+    season_start = season_start + pd.to_timedelta((7 - season_start.dayofweek) % 7 + 7, unit="D")
+    dates = season_start[season] + pd.to_timedelta((week - 1) * 7 + day * 2, unit="D")
+
+    sessions = pd.DataFrame({
+        "season_phase": np.array(PHASES)[np.minimum((week - 1) * len(PHASES) // weeks, len(PHASES) - 1)],
+        "week_number": week,
+        "day_in_week": np.array(DAYS)[day],
+        "date": dates.strftime("%Y-%m-%d"),
+        "athlete_name": names[athlete],
+        "gender": genders[athlete],
+        "grade": np.minimum(first_grade[athlete] + season, 12),
+        "_ability": ability[athlete],
+    })
+    sessions = pd.concat([sessions, catalog.iloc[metric].reset_index(drop=True)], axis=1)
+
+    df = sessions.loc[sessions.index.repeat(attempts)].reset_index(drop=True)
+    df["attempt_number"] = np.tile(np.arange(1, attempts + 1), n_sessions)
+    df = df.iloc[:rows]
+
+    # Lower input is better for times; flip the ability shift for them.
+    better_low = (df["input_unit"] == "s").to_numpy()
+    shift = np.where(better_low, -1.0, 1.0) * df["_ability"].to_numpy() * 0.5
+    noise = rng.normal(0.0, 0.5, size=len(df))
+    values = df["typical"].to_numpy() + (shift + noise) * df["spread"].to_numpy()
+    df["input_value"] = np.round(np.maximum(values, df["typical"].to_numpy() * 0.3), 2)
+    df["display_value"] = np.nan
+    for formula, idx in df.groupby("conversion_formula").groups.items():
+        df.loc[idx, "display_value"] = utils.compile_formula(formula)(df.loc[idx, "input_value"].to_numpy())
+    df["display_value"] = df["display_value"].round(2)
+    df["notes"] = ""
+    return df[SESSION_COLUMNS]
+
+# How write_sessions splits the attempts into files: one per season year (the
+# way data/sessions is laid out), per training week, or per training day
+# (many small drops, the case the parse pool is for).
+LAYOUTS = {
+    "season": lambda df: df["date"].str[:4],
+    "week": lambda df: df["date"].str[:4] + "-w" + df["week_number"].map("{:02d}".format),
+    "day": lambda df: df["date"],
+}
+
+def write_sessions(df, out_dir, layout="season"):
+    """Write `df` as CSVs split per LAYOUTS[layout]; returns the paths."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for part, rows in df.groupby(LAYOUTS[layout](df), sort=True):
+        path = out_dir / f"Synthetic-{part}.csv"
+        rows.to_csv(path, index=False)
+        paths.append(path)
+    return paths
+
+# -------------------------------
+# Benchmark
+# -------------------------------
+SIZES = [10_000, 100_000, 1_000_000]
+
+def _timed(results, stage, fn, repeat=1):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    results[stage] = best
+    return value
+
+def run_benchmark(rows, repeat=1, seed=0):
+    """Seconds per pipeline stage for a synthetic dataset of `rows` attempts."""
+    results = {}
+    raw = generate_sessions(rows, athletes=max(60, rows // 2000), seed=seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        # Serial and pooled parsing both run without a snapshot, so the pair
+        # differs only in the worker count.
+        for layout in ["season", "day"]:
+            session_dir = Path(tmp) / layout
+            write_sessions(raw, session_dir, layout)
+            serial = utils.SessionStore(session_dir, workers=1)
+            _timed(results, f"load ({layout} files, serial)", lambda: serial.refresh(serial.scan()))
+            pooled = utils.SessionStore(session_dir, workers=utils.parse_workers())
+            data, _ = _timed(results, f"load ({layout} files, pooled)", lambda: pooled.refresh(pooled.scan()))
+
+        snapshot = Path(tmp) / "sessions.parquet"
+        cold = utils.SessionStore(session_dir, snapshot)
+        _timed(results, "load (day files, pooled + snapshot write)", lambda: cold.refresh(cold.scan()))
+        warm = utils.SessionStore(session_dir, snapshot)
+        _timed(results, "load (snapshot)", lambda: warm.refresh(warm.scan()), repeat)
+
+    _timed(results, "normalize", lambda: utils.normalize_sessions(raw), repeat)
+    normalized = utils.normalize_sessions(raw)
+    _timed(results, "unit conversion", lambda: utils.convert_units(normalized), repeat)
+
+    engine = _timed(results, "filter engine build", lambda: utils.FilterEngine(data), repeat)
+    athletes = engine.options("athlete_name")[:10]
+    metrics = engine.options("metric_name")[:3]
+    lo, hi = engine.week_extent
+    filters = utils.Filters(10, [], athletes, metrics, [], [], (lo + 1, hi), True, [])
+    _timed(results, "filter (cold masks)", lambda: utils.FilterEngine(data).rows(filters), repeat)
+    _timed(results, "filter (cached masks)", lambda: engine.rows(filters), repeat)
+
+    dims = _timed(results, "metric dimensions", lambda: utils.build_metric_dimensions(data), repeat)
+    directions = dims["direction"]
+    pbs = _timed(results, "personal bests",
+                 lambda: utils.rank_athletes(data, directions, by=utils.PB_KEYS), repeat)
+    cube = _timed(results, "performance cube build", lambda: utils.PerformanceCube(data, directions), repeat)
+    # The watcher's usual case: the latest day file appended onto an existing cube.
+    split = int((data["date"] < data["date"].max()).sum())
+    earlier = utils.PerformanceCube(data.iloc[:split], directions)
+    _timed(results, "performance cube extend (one day file)",
+           lambda: earlier.extend(data.iloc[split:], directions), repeat)
+    phase_filters = filters._replace(athletes=[], phases=engine.options("season_phase")[:1], week_range=(lo, hi))
+    _timed(results, "personal bests (phase, rows)", lambda: utils.rank_athletes(
+        data.take(engine.rows(phase_filters)), directions, by=utils.PB_KEYS), repeat)
+    _timed(results, "personal bests (phase, cube)", lambda: cube.personal_bests(phase_filters), repeat)
+
+    def leaderboards():
+        boards = []
+        for families in utils.build_views(pbs).values():
+            for leaves in families.values():
+                for spec in leaves:
+                    rows_ = utils.view_rows(pbs, spec, dims)
+                    if not rows_.empty:
+                        boards += [(spec, b) for _, b, _ in utils.leaderboard_boards(rows_, spec, directions, 10, True)]
+        return boards
+    boards = _timed(results, "leaderboards (all views)", leaderboards, repeat)
+
+    latest_year = int(data["year"].max())
+    _timed(results, "home summary", lambda: utils.HomeSummary(data, pbs, directions, latest_year), repeat)
+
+    def chart_specs():
+        for spec, board in boards:
+            utils.leaderboard_chart_spec(board.reset_index(drop=True), spec.label, "", "")
+    _timed(results, "chart specs (all boards)", chart_specs, repeat)
+
+    maxv = data[data["metric_family"] == "MaxV"]
+    _timed(results, "progression summary (MaxV)", lambda: (
+        utils.weekly_quantiles(maxv), utils.weekly_sample(maxv, directions)), repeat)
+    _timed(results, "athlete series", lambda: utils.AthleteSeries(data, directions), repeat)
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=SIZES, help="Dataset sizes to run.")
+    parser.add_argument("--repeat", type=int, default=1, help="Best of N for each warm stage.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", type=Path, help="Also write the results here.")
+    parser.add_argument("--generate", type=Path, metavar="DIR",
+                        help="Only write synthetic session CSVs (of the first --rows size) to DIR.")
+    parser.add_argument("--layout", choices=list(LAYOUTS), default="season",
+                        help="One --generate file per season, training week or training day.")
+    args = parser.parse_args(argv)
+
+    if args.generate:
+        for path in write_sessions(generate_sessions(args.rows[0], seed=args.seed), args.generate, args.layout):
+            print(path)
+        return
+
+    all_results = {}
+    for rows in args.rows:
+        all_results[rows] = run_benchmark(rows, args.repeat, args.seed)
+
+    table = pd.DataFrame(all_results)
+    table.columns = [f"{rows:,} rows" for rows in table.columns]
+    print(f"pooled = {utils.parse_workers()} parse workers")
+    print(table.map(lambda s: f"{s * 1000:9.1f} ms").to_string())
+    if args.json:
+        args.json.write_text(json.dumps({str(k): v for k, v in all_results.items()}, indent=1))
+
+if __name__ == "__main__":
+    main()
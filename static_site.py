@@ -0,0 +1,217 @@
+"""Pre-render Home, Leaderboards and Progression as a static site for GitHub Pages.
+
+    python -m static_site                  # writes docs/
+    python -m static_site --out site --top-n 5
+
+Each page is plain HTML with the Vega-Lite specs (and their data) embedded,
+so the deployment needs no Python at view time. Tables and charts come from
+the same utils functions the Streamlit pages use.
+"""
+import argparse
+import html
+import json
+from datetime import date
+from pathlib import Path
+
+import altair as alt
+
+import streamlit as st
+import utils
+
+SITE_DIR = utils.BASE_DIR / "docs"
+SITE_PAGES = [("index.html", "Home"), ("leaderboards.html", "Leaderboards"), ("progression.html", "Progression")]
+SITE_STYLE = """
+body { font-family: system-ui, sans-serif; margin: 0 auto; max-width: 1200px; padding: 0 1rem 3rem; }
+nav a { margin-right: 1rem; }
+table { border-collapse: collapse; margin: 0.5rem 0 1.5rem; font-size: 0.9rem; }
+th, td { border-bottom: 1px solid #ddd; padding: 0.25rem 0.75rem; text-align: left; }
+.grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(320px, 1fr)); gap: 1.5rem; }
+.chart { width: 100%; }
+"""
+
+# Metric, athlete and band names come from the session CSVs, so every piece
+# of text put into the markup goes through html.escape (to_html escapes the
+# table cells itself).
+esc = html.escape
+
+def _records(df):
+    """JSON-safe row dicts (NaN becomes null, dates ISO)."""
+    return json.loads(utils.plain_frame(df).to_json(orient="records", double_precision=4))
+
+def _html_table(df):
+    return df.to_html(index=False, border=0, na_rep="", float_format="%.2f")
+
+class _SitePage:
+    """Accumulates HTML and the chart specs it embeds."""
+
+    def __init__(self, title):
+        self.title = title
+        self.body = []
+        self.specs = {}
+
+    def add(self, markup):
+        self.body.append(markup)
+
+    def chart(self, spec):
+        chart_id = f"chart-{len(self.specs)}"
+        self.specs[chart_id] = spec
+        self.add(f'<div class="chart" id="{chart_id}"></div>')
+
+    def render(self):
+        nav = " ".join(f'<a href="{href}">{esc(label)}</a>' for href, label in SITE_PAGES)
+        specs = json.dumps(self.specs, separators=(",", ":")).replace("</", "<\\/")
+        cdn = "https://cdn.jsdelivr.net/npm"
+        return "\n".join([
+            "<!doctype html>",
+            "<html><head><meta charset='utf-8'>",
+            "<meta name='viewport' content='width=device-width, initial-scale=1'>",
+            f"<title>{esc(self.title)} · LCA Speed Journal</title>",
+            f"<style>{SITE_STYLE}</style>",
+            f"<script src='{cdn}/vega@{alt.VEGA_VERSION}'></script>",
+            f"<script src='{cdn}/vega-lite@{alt.VEGALITE_VERSION}'></script>",
+            f"<script src='{cdn}/vega-embed@{alt.VEGAEMBED_VERSION}'></script>",
+            "</head><body>",
+            f"<nav>{nav}</nav>",
+            f"<h1>{esc(self.title)}</h1>",
+            *self.body,
+            f"<script type='application/json' id='chart-specs'>{specs}</script>",
+            "<script>",
+            "const specs = JSON.parse(document.getElementById('chart-specs').textContent);",
+            "for (const [id, spec] of Object.entries(specs)) vegaEmbed('#' + id, spec, {actions: false});",
+            "</script>",
+            "</body></html>",
+        ])
+
+# -------------------------------
+# Pages
+# -------------------------------
+def _site_home(data, pbs, directions, today):
+    page = _SitePage("📊 Performance Dashboard")
+    summary = utils.HomeSummary(data, pbs, directions, today.year)
+    page.add("<h2>🏆 All-Time Leaders</h2>")
+    for gender, gender_label in utils.GENDER_LABELS.items():
+        page.add(f"<h3>{esc(gender_label)}</h3><div class='grid'>")
+        for band in utils.GRADE_BANDS:
+            page.add(f"<div><h4>{esc(band)}</h4>{_html_table(summary.leaders(gender, band))}</div>")
+        page.add("</div>")
+
+    year = today.year
+    if utils.is_offseason(today):
+        page.add(f"<h2>📅 Year in Review ({year})</h2>")
+        for gender, gender_label in utils.GENDER_LABELS.items():
+            page.add(f"<h3>🏅 Top Performances of the Season: {esc(gender_label)}</h3>")
+            for band in utils.GRADE_BANDS:
+                page.add(f"<h4>{esc(band)}</h4><div class='grid'>")
+                for metric_label in utils.HOME_METRICS:
+                    top = summary.top(gender, band, metric_label)
+                    page.add(f"<div><strong>{esc(metric_label)}</strong>"
+                             f"{_html_table(top) if not top.empty else '<p>No data</p>'}</div>")
+                page.add("</div>")
+        page.add("<div class='grid'>")
+        page.add(f"<div><h3>📊 Participation</h3>{_html_table(summary.participation)}</div>")
+        page.add(f"<div><h3>⏱️ Consistency</h3>{_html_table(summary.consistency)}</div>")
+        page.add("</div>")
+    else:
+        page.add("<h2>⏱️ Recent Session Highlights</h2>")
+        if not summary.has_season:
+            page.add("<p>No data available for the current year.</p>")
+        else:
+            for gender, gender_label in utils.GENDER_LABELS.items():
+                page.add(f"<h3>{esc(gender_label)}</h3><div class='grid'>")
+                for band in utils.GRADE_BANDS:
+                    page.add(f"<div><h4>{esc(band)}</h4>{_html_table(summary.highlights(gender, band))}</div>")
+                page.add("</div>")
+    page.add(f"<p><small>Built {today:%Y-%m-%d} from {len(data)} attempts.</small></p>")
+    return page
+
+def _view_title(spec, family_label):
+    return esc(" / ".join(p for p in [spec.category, family_label, spec.label] if p))
+
+def _site_leaderboards(data, pbs, dims, top_n):
+    page = _SitePage("📊 Leaderboards")
+    directions = dims["direction"]
+    for category, families in utils.build_views(pbs).items():
+        for family_label, leaves in families.items():
+            for spec in leaves:
+                rows = utils.view_rows(pbs, spec, dims)
+                if rows.empty:
+                    continue
+                unit = utils.first_unit(rows["display_unit"])
+                input_unit = utils.first_unit(rows["input_unit"])
+                page.add(f"<h2>{_view_title(spec, family_label)}</h2><div class='grid'>")
+                for suffix, board, _ in utils.leaderboard_boards(rows, spec, directions, top_n, True):
+                    board_key = suffix.lstrip("-")
+                    chart_spec, chart_data = utils.leaderboard_chart_spec(
+                        board.reset_index(drop=True), spec.label, unit, input_unit)
+                    page.add(f"<div><h3>{esc(utils.BOARD_LABELS.get(board_key, board_key))}</h3>")
+                    page.chart({**chart_spec, "data": {"values": _records(chart_data)}})
+                    table = utils.plain_frame(board).rename(columns={
+                        "athlete_name": "Athlete", "display_value": f"Output ({unit})",
+                        "input_value": f"Input ({input_unit})", "date": "Date",
+                        "gender": "Gender", "metric_name": "Metric",
+                    })
+                    page.add(_html_table(table) + "</div>")
+                page.add("</div>")
+    return page
+
+def _site_progression(data, dims):
+    # The static page always uses the weekly summary so each chart stays small.
+    page = _SitePage("📈 Progression")
+    directions = dims["direction"]
+    for category, families in utils.build_views(data).items():
+        for family_label, leaves in families.items():
+            for spec in leaves:
+                rows = utils.view_rows(data, spec, dims)
+                rows = rows[rows["display_value"].notna() & rows["week_number"].notna()]
+                if rows.empty:
+                    continue
+                page.add(f"<h2>{_view_title(spec, family_label)}</h2><div class='grid'>")
+                for gender in sorted(rows["gender"].dropna().unique()):
+                    team_df = rows[rows["gender"] == gender]
+                    chart = utils.summary_progression_chart(team_df, directions).properties(
+                        width="container", height=400)
+                    page.add(f"<div><h3>{esc(utils.GENDER_LABELS.get(gender, gender))}</h3>")
+                    page.chart(chart.to_dict())
+                    page.add("</div>")
+                page.add("</div>")
+    return page
+
+def build_site(data, out_dir=SITE_DIR, top_n=10, today=None):
+    """Write the static site (three pages plus the export data files); returns the paths written."""
+    today = today or date.today()
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    pbs = utils.personal_bests(data)
+    dims = utils.metric_dimensions(data)
+
+    pages = {
+        "index.html": _site_home(data, pbs, dims["direction"], today),
+        "leaderboards.html": _site_leaderboards(data, pbs, dims, top_n),
+        "progression.html": _site_progression(data, dims),
+    }
+    written = []
+    for name, page in pages.items():
+        path = out_dir / name
+        path.write_text(page.render(), encoding="utf-8")
+        written.append(path)
+    # Serve files as-is on GitHub Pages (no Jekyll processing).
+    (out_dir / ".nojekyll").touch()
+    written += utils.write_export(utils.export_tables(data, top_n), out_dir / "data", ["json", "csv"])
+    return written
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m static_site", description=__doc__.splitlines()[0])
+    parser.add_argument("--out", default=SITE_DIR, type=Path, help="Output directory (default: docs/).")
+    parser.add_argument("--top-n", type=int, default=10, help="Entries per leaderboard.")
+    args = parser.parse_args(argv)
+
+    st.logger.set_log_level("error")   # no Streamlit runtime here; its caches still work
+    data, _ = utils.load_all_sessions()
+    if data.empty:
+        parser.error(f"No session data found under {utils.DATA_DIR}")
+    # The pages chart every attempt, so on the sqlite backend they are read back out once here.
+    for path in build_site(utils.session_frame(data), args.out, args.top_n):
+        print(path)
+
+if __name__ == "__main__":
+    main()
@@ -2,24 +2,1317 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import hashlib
+import argparse
+import ast
+import csv
+import functools
+import html
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
 import altair as alt
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date, datetime
 from pathlib import Path
 from glob import glob
+from typing import NamedTuple
+from pandas.api.types import union_categoricals
+from pandas.io.formats.style import Styler
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 
 BASE_DIR = Path(__file__).parent
 DATA_DIR = BASE_DIR / "data" / "sessions"
+CACHE_DIR = BASE_DIR / "data" / ".cache"
+SNAPSHOT_PATH = CACHE_DIR / "sessions.parquet"
+
+# Bump whenever normalize_sessions changes so stale snapshots are rebuilt.
+SNAPSHOT_FORMAT = 7
 
 st.set_page_config(layout="wide")
 
-@st.cache_data
+# The session frame and its derived tables are shared by every run in the
+# process (see load_all_sessions), so nothing may write into them in place.
+# With Copy-on-Write a filtered or modified frame never writes through to
+# the one it came from; pandas 3 always works this way.
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+# -------------------------------
+# Normalization
+# -------------------------------
+# Low-cardinality text columns are stored as categoricals so filters and
+# groupbys run on integer codes instead of Python strings.
+CATEGORY_COLUMNS = [
+    "season_phase", "day_in_week", "metric_category", "metric_family", "metric_name",
+    "metric_id", "input_unit", "display_unit", "conversion_formula", "athlete_name", "gender",
+]
+INTEGER_COLUMNS = {"week_number": "Int16", "grade": "Int8", "attempt_number": "Int8", "year": "Int16"}
+VALUE_COLUMNS = ["input_value", "display_value"]
+# Scatter jitter is derived from the row itself so charts are identical across reruns.
+JITTER_KEY = ["athlete_name", "date", "metric_name", "attempt_number"]
+JITTER_WIDTH = 0.2
+
+GENDER_CODES = {"m": "M", "male": "M", "f": "F", "female": "F"}
+GENDER_LABELS = {"M": "Male", "F": "Female"}
+
+def _clean_category(value):
+    return str(value).strip()
+
+def _clean_gender(value):
+    value = _clean_category(value)
+    return GENDER_CODES.get(value.lower(), value)
+
+def _as_category(values, clean=_clean_category):
+    """Convert to a categorical, cleaning the categories rather than every row."""
+    if not isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.astype("category")
+    old = values.cat.categories
+    cleaned = [clean(c) for c in old]
+    if list(old) == cleaned:
+        return values
+    categories = pd.Index(list(dict.fromkeys(cleaned)))
+    remap = np.append(categories.get_indexer(cleaned), -1)
+    codes = remap[values.cat.codes.to_numpy()]
+    return pd.Series(pd.Categorical.from_codes(codes, categories), index=values.index, name=values.name)
+
+def normalize_sessions(df):
+    """Canonical typing for session data; safe to run on already-normalized frames.
+
+    Text dimensions become categoricals (gender as "M"/"F"), week/grade/attempt
+    nullable integers, `date` datetime64 with a derived `year`, the values
+    float32, and a deterministic scatter `jitter` per row.
+    """
+    out = df.copy()
+    for col in CATEGORY_COLUMNS:
+        if col in out.columns:
+            out[col] = _as_category(out[col], _clean_gender if col == "gender" else _clean_category)
+    if "date" in out.columns:
+        out["date"] = pd.to_datetime(out["date"], errors="coerce")
+        out["year"] = out["date"].dt.year
+    for col, dtype in INTEGER_COLUMNS.items():
+        if col in out.columns:
+            values = pd.to_numeric(out[col], errors="coerce")
+            # A fractional week/grade/attempt (a typo like 3.5) becomes NA rather than failing the cast
+            out[col] = values.where(values.isna() | (values % 1 == 0)).astype(dtype)
+    for col in VALUE_COLUMNS:
+        if col in out.columns:
+            out[col] = pd.to_numeric(out[col], errors="coerce").astype("float32")
+    if "jitter" not in out.columns:
+        out["jitter"] = _row_jitter(out)
+    return out
+
+def _row_jitter(df):
+    """Stable offset in [-JITTER_WIDTH, JITTER_WIDTH) hashed from each row's JITTER_KEY."""
+    key = [c for c in JITTER_KEY if c in df.columns]
+    if not key or df.empty:
+        return np.zeros(len(df), dtype="float32")
+    hashes = pd.util.hash_pandas_object(df[key], index=False).to_numpy()
+    unit = (hashes >> np.uint64(11)).astype("float64") / float(1 << 53)
+    return ((unit * 2 - 1) * JITTER_WIDTH).astype("float32")
+
+def _concat_sessions(frames):
+    """Concatenate normalized frames, unioning categoricals instead of falling back to object."""
+    combined = pd.concat(frames, ignore_index=True)
+    for col in CATEGORY_COLUMNS:
+        if col not in combined.columns or isinstance(combined[col].dtype, pd.CategoricalDtype):
+            continue
+        parts = [f[col] for f in frames if col in f.columns]
+        # union_categoricals needs one category dtype; an all-empty column in a
+        # small file has float categories, so that case takes the slow path.
+        if len(parts) == len(frames) and all(isinstance(p.dtype, pd.CategoricalDtype) for p in parts) and \
+                len({p.cat.categories.dtype for p in parts}) == 1:
+            combined[col] = pd.Series(union_categoricals(parts, ignore_order=True), name=col)
+        else:
+            combined[col] = _as_category(combined[col])
+    return combined
+
+# -------------------------------
+# Unit conversion
+# -------------------------------
+# conversion_formula is arithmetic on `value` (the input), e.g. "22.37 / value"
+# for a 10 m split in seconds to mph or "value / 60" for frames to seconds.
+# Each distinct formula is parsed once and applied to all its rows with NumPy.
+CONVERSION_TOLERANCE = 0.01   # relative gap between recorded and converted display values worth flagging
+_FORMULA_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.Constant, ast.Name, ast.Load,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.UAdd, ast.USub,
+)
+
+@functools.lru_cache(maxsize=256)
+def compile_formula(formula):
+    """Vectorized function for `formula`: numbers, `value`, + - * / and brackets only.
+
+    An empty formula is the identity. Anything else (names, calls,
+    attributes, powers) raises ValueError, so a CSV can't run code.
+    """
+    formula = str(formula).strip()
+    if not formula:
+        return lambda value: value
+    try:
+        tree = ast.parse(formula, mode="eval")
+    except SyntaxError as exc:
+        raise ValueError(f"can't parse conversion formula {formula!r}") from exc
+    names = set()
+    for node in ast.walk(tree):
+        if not isinstance(node, _FORMULA_NODES) or \
+                isinstance(node, ast.Constant) and type(node.value) not in (int, float):
+            raise ValueError(f"unsupported {type(node).__name__} in conversion formula {formula!r}")
+        if isinstance(node, ast.Name):
+            names.add(node.id)
+    if names != {"value"}:
+        raise ValueError(f"conversion formula {formula!r} must use `value` and no other names")
+    code = compile(tree, "<conversion_formula>", "eval")
+    return lambda value: eval(code, {"__builtins__": {}}, {"value": value})
+
+def _unit_text(units):
+    return units.astype(object).to_numpy()
+
+def convert_units(df):
+    """(converted, problems) for each row of `df`.
+
+    `converted` is input_value run through the row's conversion_formula as
+    float64, NaN where it can't be converted; `problems` holds the reason
+    (or None) per row: a formula that doesn't compile, or different input
+    and display units with no formula between them.
+    """
+    converted = np.full(len(df), np.nan)
+    problems = np.full(len(df), None, dtype=object)
+    if "input_value" not in df.columns or df.empty:
+        return converted, problems
+    values = df["input_value"].to_numpy(dtype="float64", na_value=np.nan)
+    if "conversion_formula" in df.columns:
+        formulas = df["conversion_formula"].astype("category")
+        codes = formulas.cat.codes.to_numpy()
+        groups = {("" if code < 0 else formulas.cat.categories[code]): rows
+                  for code, rows in pd.Series(codes).groupby(codes).indices.items()}
+    else:
+        groups = {"": np.arange(len(df))}
+
+    for formula, rows in groups.items():
+        if not formula.strip():
+            if {"input_unit", "display_unit"} <= set(df.columns):
+                inp, disp = _unit_text(df["input_unit"].iloc[rows]), _unit_text(df["display_unit"].iloc[rows])
+                differ = pd.notna(inp) & pd.notna(disp) & (inp != disp)
+                problems[rows[differ]] = [f"no conversion_formula from {a} to {b}" for a, b in zip(inp[differ], disp[differ])]
+                rows = rows[~differ]
+            converted[rows] = values[rows]
+            continue
+        try:
+            convert = compile_formula(formula)
+        except ValueError as exc:
+            problems[rows] = str(exc)
+            continue
+        try:
+            with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+                result = np.asarray(convert(values[rows]), dtype="float64")
+        except ArithmeticError as exc:   # e.g. a constant 1 / 0 inside the formula
+            problems[rows] = f"conversion formula {formula!r} fails: {exc}"
+            continue
+        converted[rows] = np.where(np.isfinite(result), result, np.nan)
+    return converted, problems
+
+def fill_display_values(df, converted, blank):
+    """Fill display values left `blank` in the CSV from `converted`; recorded values are kept as logged.
+
+    Only blank cells are filled: one that didn't parse stays NA so it gets reported.
+    """
+    if "display_value" not in df.columns:
+        return df
+    fill = blank & ~np.isnan(converted)
+    if not fill.any():
+        return df
+    values = df["display_value"].to_numpy(dtype="float32", copy=True)
+    values[fill] = converted[fill]
+    return df.assign(display_value=values)
+
+def unit_issues(data):
+    """Metrics logged with more than one input or display unit, in the ISSUE_COLUMNS layout."""
+    rows = []
+    for col in ["display_unit", "input_unit"]:
+        if {"metric_name", col} <= set(data.columns):
+            units = data.groupby("metric_name", observed=True)[col].unique()
+            for metric, values in units.items():
+                values = sorted(str(u) for u in values if pd.notna(u))
+                if len(values) > 1:
+                    rows.append(["", pd.NA, col, f"{metric}: {', '.join(values)}", "metric has several units"])
+    return pd.DataFrame(rows, columns=ISSUE_COLUMNS).astype({"line": "Int64"})
+
+# -------------------------------
+# Schema & validation
+# -------------------------------
+# The README "Data Format" columns in file order, with the type each is read
+# as. Reading typed (instead of letting pandas guess per file) keeps every
+# file's frame on the same dtypes, so combining them is a cheap union.
+SESSION_SCHEMA = {
+    "season_phase": "category", "week_number": "Int16", "day_in_week": "category", "date": "date",
+    "metric_category": "category", "metric_family": "category", "metric_name": "category",
+    "metric_id": "category", "input_unit": "category", "display_unit": "category",
+    "conversion_formula": "category", "athlete_name": "category", "gender": "category",
+    "grade": "Int8", "input_value": "float32", "display_value": "float32",
+    "attempt_number": "Int8", "notes": "text",
+}
+# A row without these can't be placed on a leaderboard or chart.
+REQUIRED_COLUMNS = ["date", "week_number", "metric_name", "athlete_name", "gender", "display_value"]
+ISSUE_COLUMNS = ["file", "line", "column", "value", "problem"]
+# CSV parser: "pyarrow" (pyarrow.csv, the default) or "c" (pandas.read_csv).
+CSV_ENGINE_ENV = "SPEED_JOURNAL_CSV_ENGINE"
+ARROW_TYPES = {
+    "category": pa.dictionary(pa.int32(), pa.string()), "Int16": pa.int16(), "Int8": pa.int8(),
+    "float32": pa.float32(), "date": pa.timestamp("us"), "text": pa.string(),
+}
+_ARROW_TO_PANDAS = {pa.int16(): pd.Int16Dtype(), pa.int8(): pd.Int8Dtype()}
+
+def _read_csv(path, columns, numbers_as_text=False):
+    if os.environ.get(CSV_ENGINE_ENV, "pyarrow") == "pyarrow" and not numbers_as_text:
+        # Parsing, typing and dictionary encoding all happen in pyarrow
+        # without the GIL, so parse threads really run side by side.
+        table = pa_csv.read_csv(path, convert_options=pa_csv.ConvertOptions(
+            column_types={c: ARROW_TYPES[SESSION_SCHEMA[c]] for c in columns}, include_columns=columns,
+            timestamp_parsers=["%Y-%m-%d"], strings_can_be_null=True,
+        ))
+        df = table.to_pandas(types_mapper=_ARROW_TO_PANDAS.get)
+        for col in df.columns:
+            # Dictionaries come in first-seen order; pandas sorts categories.
+            if isinstance(df[col].dtype, pd.CategoricalDtype):
+                df[col] = df[col].cat.reorder_categories(df[col].cat.categories.sort_values())
+        return df
+    dtypes = {c: t for c, t in SESSION_SCHEMA.items() if c in columns and t not in ("date", "text")}
+    if numbers_as_text:
+        dtypes = {c: (t if t == "category" else str) for c, t in dtypes.items()}
+    return pd.read_csv(path, usecols=columns, dtype=dtypes, date_format="%Y-%m-%d",
+                       parse_dates=["date"] if "date" in columns else None)[columns]
+
+def validate_sessions(raw, frame, name="", conversions=None, lines=None, malformed=()):
+    """One row per problem cell: missing columns, unparsed values, missing required values, conversions.
+
+    `raw` is the frame as read and `frame` the normalized one; a value that is
+    present in `raw` but NA in `frame` did not parse. `conversions` is
+    convert_units(frame) when the caller already has it. `line` is the CSV
+    line (the header is line 1), None for file-level problems. When rows were
+    skipped, `lines` gives the CSV line of each row read and `malformed` a
+    (line, note) per row skipped for having the wrong number of fields.
+    """
+    issues = [pd.DataFrame({"column": [c for c in REQUIRED_COLUMNS if c not in frame.columns],
+                            "problem": "missing column"})]
+    if malformed:
+        issues.append(pd.DataFrame({"line": [line for line, _ in malformed], "value": [v for _, v in malformed],
+                                    "problem": "wrong number of fields; row skipped"}))
+
+    def flag(mask, column, problem):
+        rows = np.flatnonzero(mask)
+        if len(rows):
+            values = raw[column].iloc[rows].astype(object) if column in raw.columns else None
+            issues.append(pd.DataFrame({"line": rows + 2 if lines is None else lines[rows],
+                                        "column": column, "problem": problem,
+                                        "value": values.to_numpy() if values is not None else None}))
+
+    for column, kind in SESSION_SCHEMA.items():
+        if column in frame.columns and kind not in ("category", "text"):
+            unparsed = frame[column].isna().to_numpy() & raw[column].notna().to_numpy()
+            if kind in ("Int8", "Int16"):
+                # normalize_sessions drops fractional weeks/grades/attempts (a typo like 3.5)
+                number = pd.to_numeric(raw[column], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+                fractional = unparsed & ~np.isnan(number)
+                flag(fractional, column, "not a whole number")
+                unparsed &= ~fractional
+            kind = "date (YYYY-MM-DD)" if kind == "date" else "number"
+            flag(unparsed, column, f"not a {kind}")
+    for column in REQUIRED_COLUMNS:
+        if column in raw.columns:
+            # display_value may have been filled in from the conversion formula
+            flag(raw[column].isna().to_numpy() & frame[column].isna().to_numpy(), column, "missing value")
+    converted, problems = conversions if conversions is not None else convert_units(frame)
+    for problem in pd.unique(problems[pd.notna(problems)]):
+        flag(problems == problem, "conversion_formula", problem)
+    if "display_value" in frame.columns:
+        recorded = raw["display_value"].notna().to_numpy() & ~np.isnan(converted)
+        display = frame["display_value"].to_numpy(dtype="float64", na_value=np.nan)
+        with np.errstate(invalid="ignore"):
+            off = recorded & (np.abs(display - converted) > CONVERSION_TOLERANCE * np.abs(display))
+        flag(off, "display_value", "doesn't match input_value and conversion_formula")
+    if "gender" in frame.columns:
+        flag((frame["gender"].notna() & ~frame["gender"].isin(list(GENDER_LABELS))).to_numpy(),
+             "gender", "unknown gender")
+
+    issues = [i for i in issues if not i.empty]
+    report = pd.concat(issues, ignore_index=True) if issues else pd.DataFrame(columns=ISSUE_COLUMNS)
+    report["file"] = name
+    report["line"] = report["line"].astype("Int64") if "line" in report.columns else pd.NA
+    return report.reindex(columns=ISSUE_COLUMNS).sort_values("line", na_position="first", kind="stable",
+                                                              ignore_index=True)
+
+def _well_formed_rows(path, n_fields):
+    """(CSV bytes of the rows with `n_fields` fields, CSV line of each, (line, note) for every other row)."""
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator="\n")
+    lines, malformed = [], []
+    with open(path, newline="", encoding="utf-8") as fh:
+        reader = csv.reader(fh)
+        writer.writerow(next(reader, []))
+        start = reader.line_num + 1
+        for row in reader:
+            if len(row) == n_fields:
+                writer.writerow(row)
+                lines.append(start)
+            elif row:   # both parsers skip blank lines
+                malformed.append((start, f"{len(row)} fields (header has {n_fields})"))
+            start = reader.line_num + 1
+    return out.getvalue().encode(), np.array(lines, dtype=int), malformed
+
+def _read_session_file(path):
+    """Typed, normalized frame for one session file and its validation report."""
+    header = pd.read_csv(path, nrows=0).columns
+    columns = [c for c in SESSION_SCHEMA if c in header]   # unknown columns are dropped
+    text, lines, malformed = None, None, []
+    if os.environ.get(CSV_ENGINE_ENV, "pyarrow") != "pyarrow":
+        # pandas.read_csv doesn't fail on a row with extra fields (it wraps them
+        # into a new row), so field counts are checked before it reads.
+        text, lines, malformed = _well_formed_rows(path, len(header))
+
+    def read(numbers_as_text=False):
+        return _read_csv(path if text is None else io.BytesIO(text), columns, numbers_as_text)
+
+    try:
+        raw = read()
+    except (ValueError, TypeError):
+        if text is None:
+            # pyarrow fails the file on a row with the wrong number of fields:
+            # skip (and report) those rows and read the rest.
+            text, lines, malformed = _well_formed_rows(path, len(header))
+        try:
+            raw = read()
+        except (ValueError, TypeError):
+            # Some cell isn't a (whole) number: read the numeric columns as text so
+            # the bad cells become NA (and get reported) instead of failing the file.
+            # The pandas parser raises TypeError for a fractional integer.
+            raw = read(numbers_as_text=True)
+    frame = normalize_sessions(raw)
+    conversions = convert_units(frame)
+    if "display_value" in raw.columns:
+        frame = fill_display_values(frame, conversions[0], raw["display_value"].isna().to_numpy())
+    return frame, validate_sessions(raw, frame, Path(path).name, conversions, lines, malformed)
+
+# -------------------------------
+# Small thread-safe LRU
+# -------------------------------
+class LRUCache:
+    """Bounded mapping that evicts the least recently used entry."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._items:
+                return default
+            self._items.move_to_end(key)
+            return self._items[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+        return value
+
+    def __len__(self):
+        return len(self._items)
+
+# -------------------------------
+# Instrumentation
+# -------------------------------
+# Off by default. With SPEED_JOURNAL_DEBUG=1 (or ?debug=1 in the URL) each
+# page run records stage timings, cache hits/misses and payload sizes, shown
+# in a sidebar panel and downloadable as JSON.
+DEBUG_ENV = "SPEED_JOURNAL_DEBUG"
+_PROFILE_KEY = "_run_profile"
+
+class RunProfile:
+    """What one page run spent its time on."""
+
+    def __init__(self, page):
+        self.page = page
+        self.started = time.time()
+        self.stages = []      # (stage, seconds), in completion order
+        self.caches = {}      # cached function -> {"hits", "misses", "seconds"}
+        self.payloads = []    # (kind, label, bytes)
+
+    def record_cache(self, name, missed, seconds):
+        entry = self.caches.setdefault(name, {"hits": 0, "misses": 0, "seconds": 0.0})
+        entry["misses" if missed else "hits"] += 1
+        entry["seconds"] += seconds
+
+    def as_dict(self):
+        return {
+            "page": self.page,
+            "started": datetime.fromtimestamp(self.started).isoformat(timespec="seconds"),
+            "stages": [{"stage": name, "seconds": round(sec, 6)} for name, sec in self.stages],
+            "caches": {name: {**c, "seconds": round(c["seconds"], 6)} for name, c in self.caches.items()},
+            "payloads": [{"kind": kind, "label": label, "bytes": size} for kind, label, size in self.payloads],
+        }
+
+def debug_enabled():
+    if os.environ.get(DEBUG_ENV, "").lower() in ("1", "true", "yes"):
+        return True
+    return get_script_run_ctx(suppress_warning=True) is not None and st.query_params.get("debug") == "1"
+
+def start_profile(page):
+    """Start a fresh profile for this run when debugging; returns it (or None)."""
+    if get_script_run_ctx(suppress_warning=True) is None:
+        return None
+    profile = RunProfile(page) if debug_enabled() else None
+    st.session_state[_PROFILE_KEY] = profile
+    return profile
+
+def current_profile():
+    # Worker threads and the CLI have no script context, so nothing is recorded there.
+    if get_script_run_ctx(suppress_warning=True) is None:
+        return None
+    return st.session_state.get(_PROFILE_KEY)
+
+@contextmanager
+def timed(stage):
+    profile = current_profile()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if profile is not None:
+            profile.stages.append((stage, time.perf_counter() - start))
+
+_cache_calls = threading.local()
+
+def profiled(cache):
+    """Apply a Streamlit cache decorator, counting hits and misses in the run profile.
+
+    The wrapped body only runs on a miss, so it flags the innermost pending
+    call; anything that returns without the flag was a hit.
+    """
+    def decorate(fn):
+        name = fn.__name__.lstrip("_")
+
+        @functools.wraps(fn)
+        def compute(*args, **kwargs):
+            pending = getattr(_cache_calls, "pending", None)
+            if pending:
+                pending[-1] = True
+            return fn(*args, **kwargs)
+
+        cached = cache(compute)
+
+        @functools.wraps(fn)
+        def call(*args, **kwargs):
+            profile = current_profile()
+            if profile is None:
+                return cached(*args, **kwargs)
+            pending = _cache_calls.__dict__.setdefault("pending", [])
+            pending.append(False)
+            start = time.perf_counter()
+            try:
+                return cached(*args, **kwargs)
+            finally:
+                profile.record_cache(name, pending.pop(), time.perf_counter() - start)
+
+        call.clear = cached.clear
+        return call
+    return decorate
+
+def payload_bytes(obj):
+    """Roughly what Streamlit sends for `obj`: Arrow IPC for frames, JSON for specs."""
+    if isinstance(obj, Styler):
+        obj = obj.data
+    if isinstance(obj, pd.DataFrame):
+        table = pa.Table.from_pandas(obj, preserve_index=False)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().size
+    if isinstance(obj, alt.TopLevelMixin):
+        obj = obj.to_dict()
+    return len(json.dumps(obj, default=str))
+
+def record_payload(kind, label, obj):
+    profile = current_profile()
+    if profile is not None:
+        profile.payloads.append((kind, label, payload_bytes(obj)))
+
+def debug_panel():
+    """Sidebar summary of the current run's profile, with a JSON download."""
+    profile = current_profile()
+    if profile is None:
+        return
+    with st.sidebar.expander("🛠️ Run profile", expanded=False):
+        stages = pd.DataFrame(profile.stages, columns=["Stage", "Seconds"])
+        st.caption(f"{profile.page}: {stages['Seconds'].sum():.3f}s in timed stages")
+        st.dataframe(stages.style.format({"Seconds": "{:.4f}"}), hide_index=True)
+        caches = pd.DataFrame.from_dict(profile.caches, orient="index").rename_axis("Cache").reset_index()
+        if not caches.empty:
+            st.dataframe(caches.style.format({"seconds": "{:.4f}"}), hide_index=True)
+        payloads = pd.DataFrame(profile.payloads, columns=["Kind", "Label", "Bytes"])
+        if not payloads.empty:
+            st.caption(f"Payload: {payloads['Bytes'].sum() / 1024:.1f} KiB")
+            st.dataframe(payloads, hide_index=True)
+        st.download_button(
+            "Download JSON", json.dumps(profile.as_dict(), indent=1),
+            file_name=f"profile-{profile.page.lower()}.json", mime="application/json",
+        )
+
+# -------------------------------
+# Session loading
+# -------------------------------
+class FileSignature(NamedTuple):
+    path: str
+    size: int
+    mtime_ns: int
+    digest: str
+
+
+def signature_version(signatures):
+    """Short fingerprint of a set of file signatures (names and contents)."""
+    return hashlib.md5(
+        "|".join(f"{Path(sig.path).name}:{sig.digest}" for sig in signatures).encode()
+    ).hexdigest()[:12]
+
+# Threads used to parse changed session files; pyarrow releases the GIL
+# while it parses, so a backfill of many files uses every core.
+WORKERS_ENV = "SPEED_JOURNAL_WORKERS"
+
+def parse_workers():
+    """SPEED_JOURNAL_WORKERS, or min(8, cores) when it is unset or not a positive whole number."""
+    default = min(8, os.cpu_count() or 1)
+    try:
+        workers = int(os.environ.get(WORKERS_ENV) or default)
+    except ValueError:
+        # Runs at import (for _STORE), so a typo in the variable must not take the pages down.
+        return default
+    return workers if workers >= 1 else default
+
+def _read_session_files(paths, workers):
+    """_read_session_file() for each path, in the order given, up to `workers` at a time."""
+    workers = min(workers, len(paths))
+    if workers <= 1:
+        yield from map(_read_session_file, paths)
+        return
+    with ThreadPoolExecutor(workers, thread_name_prefix="session-parse") as pool:
+        yield from pool.map(_read_session_file, paths)
+
+def _hash_file(path):
+    h = hashlib.md5()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class SessionStore:
+    """Keeps one parsed frame per session file so a new drop costs one parse.
+
+    `scan()` is cheap (a stat per file, hashing only files whose size/mtime
+    moved); `refresh()` parses new or changed files and rebuilds the combined
+    frame from the per-file cache, parsing up to `workers` files at once.
+    The normalized combined frame is mirrored to a Parquet snapshot so a cold
+    process only re-parses files that changed since the snapshot was written.
+    """
+
+    def __init__(self, data_dir, snapshot_path=None, workers=None):
+        self.data_dir = Path(data_dir)
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else None
+        self.workers = workers or parse_workers()
+        self.data = pd.DataFrame()
+        self.files = []
+        self.version = None
+        self._lock = threading.Lock()
+        self._stat_cache = {}   # path -> last FileSignature seen by scan()
+        self._parsed = {}       # path -> (digest, DataFrame)
+        self._appended = None   # (version, rows) the current frame was appended onto
+        self.issues = {}        # path -> validate_sessions() report
+
+    def scan(self):
+        signatures = []
+        with self._lock:
+            for path in sorted(glob(str(self.data_dir / "*.csv"))):
+                stat = os.stat(path)
+                known = self._stat_cache.get(path)
+                if known is None or (known.size, known.mtime_ns) != (stat.st_size, stat.st_mtime_ns):
+                    known = FileSignature(path, stat.st_size, stat.st_mtime_ns, _hash_file(path))
+                    self._stat_cache[path] = known
+                signatures.append(known)
+            for gone in set(self._stat_cache) - {sig.path for sig in signatures}:
+                del self._stat_cache[gone]
+        return tuple(signatures)
+
+    def refresh(self, signatures):
+        with self._lock:
+            paths = [sig.path for sig in signatures]
+            if not self._parsed:
+                with timed("snapshot read"):
+                    self._seed_from_snapshot(signatures)
+            changed = [sig for sig in signatures if self._parsed.get(sig.path, (None,))[0] != sig.digest]
+            if not changed and paths == self.files:
+                self.version = signature_version(signatures)
+                return self.data, self.files
+
+            new_frames = []
+            with timed(f"parse + normalize ({len(changed)} files)"):
+                parsed = _read_session_files([sig.path for sig in changed], self.workers)
+                for sig, (frame, issues) in zip(changed, parsed):
+                    self._parsed[sig.path] = (sig.digest, frame)
+                    self.issues[sig.path] = issues
+                    new_frames.append(frame)
+            for gone in set(self._parsed) - set(paths):
+                del self._parsed[gone]
+                self.issues.pop(gone, None)
+
+            # New files that sort after everything already loaded (the usual
+            # weekly drop) are appended; anything else is re-concatenated from
+            # the per-file cache so row order matches a cold load.
+            appended = paths[:len(self.files)] == self.files and \
+                all(sig.path not in self.files for sig in changed)
+            with timed("combine"):
+                self._appended = None
+                if not paths:
+                    self.data = pd.DataFrame()
+                elif appended and not self.data.empty:
+                    self._appended = (self.version, len(self.data))
+                    self.data = _concat_sessions([self.data, *new_frames])
+                else:
+                    self.data = _concat_sessions([self._parsed[p][1] for p in paths])
+            self.files = paths
+            self.version = signature_version(signatures)
+            with timed("snapshot write"):
+                self._write_snapshot(signatures)
+            return self.data, self.files
+
+    def parsed(self):
+        """path -> (digest, frame) for every file parsed or seeded so far."""
+        with self._lock:
+            return dict(self._parsed)
+
+    def appended_to(self, version):
+        """(base version, base rows) if the frame for `version` is that version's frame plus new rows, else None."""
+        with self._lock:
+            return self._appended if version == self.version else None
+
+    def _seed_from_snapshot(self, signatures):
+        """Fill the per-file cache from the snapshot for files that still match."""
+        if self.snapshot_path is None or not self.snapshot_path.exists():
+            return
+        try:
+            table = pq.read_table(self.snapshot_path, memory_map=True)
+            manifest = json.loads(table.schema.metadata[b"speed_journal"])
+        except (OSError, KeyError, ValueError, pa.ArrowException):
+            return
+        if manifest.get("format") != SNAPSHOT_FORMAT:
+            return
+
+        current = {Path(sig.path).name: sig for sig in signatures}
+        snapshot = table.to_pandas()
+        offset = 0
+        for name, digest, rows in manifest["files"]:
+            sig = current.get(name)
+            if sig is not None and sig.digest == digest:
+                frame = snapshot.iloc[offset:offset + rows].reset_index(drop=True)
+                self._parsed[sig.path] = (digest, frame)
+                self.issues[sig.path] = pd.DataFrame(manifest["issues"].get(name, []), columns=ISSUE_COLUMNS)
+            offset += rows
+
+        if [name for name, _, _ in manifest["files"]] == list(current) and \
+                all(path in self._parsed for path in (sig.path for sig in signatures)):
+            # Nothing changed since the snapshot: use it as the combined frame.
+            self._appended = None
+            self.data = snapshot
+            self.files = [sig.path for sig in signatures]
+
+    def _write_snapshot(self, signatures):
+        if self.snapshot_path is None or self.data.empty:
+            return
+        manifest = {
+            "format": SNAPSHOT_FORMAT,
+            "files": [[Path(sig.path).name, sig.digest, len(self._parsed[sig.path][1])] for sig in signatures],
+            "issues": {Path(path).name: json.loads(report.to_json(orient="records"))
+                       for path, report in self.issues.items() if not report.empty},
+        }
+        table = pa.Table.from_pandas(self.data, preserve_index=False)
+        metadata = {**(table.schema.metadata or {}), b"speed_journal": json.dumps(manifest).encode()}
+        tmp = self.snapshot_path.with_suffix(".tmp")
+        try:
+            self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+            pq.write_table(table.replace_schema_metadata(metadata), tmp)
+            os.replace(tmp, self.snapshot_path)
+        except OSError:
+            # A read-only checkout still works, it just pays for CSV parsing.
+            pass
+
+
+_STORE = SessionStore(DATA_DIR, SNAPSHOT_PATH)
+
+@profiled(st.cache_resource(show_spinner=False, max_entries=2))
+def _load_sessions(signatures):
+    return _STORE.refresh(signatures)
+
+# The version of the frame this thread's run loaded; the watcher may move the
+# store on while a run is still using the previous frame.
+_loaded = threading.local()
+
 def load_all_sessions():
-    files = glob(str(DATA_DIR / "*.csv"))
-    if not files:
-        return pd.DataFrame(), []
-    df_list = [pd.read_csv(f) for f in files]
-    return pd.concat(df_list, ignore_index=True), files
+    """The combined session frame and file list, shared read-only by every run.
+
+    One copy lives in the process however many viewers are connected; derive
+    new frames from it (filter, assign) rather than modifying it in place.
+    On the sqlite backend the "frame" is a DatabaseSessions handle and the
+    attempts stay in the database.
+    """
+    # The signatures are the cache key, so new or edited files are picked up
+    # on the next rerun without clearing the cache.
+    with timed("load"):
+        signatures = _STORE.scan()
+        _loaded.version = signature_version(signatures)
+        if using_sqlite():
+            return _load_database(signatures)
+        return _load_sessions(signatures)
+
+@profiled(st.cache_resource(show_spinner=False, max_entries=2))
+def _unit_issues(_data, version):
+    return unit_issues(_data)
+
+def session_issues():
+    """Validation problems across the loaded session files (empty when all is well)."""
+    if using_sqlite():
+        return _sql_session_issues(data_version())
+    with _STORE._lock:
+        reports = [_STORE.issues[path] for path in _STORE.files if path in _STORE.issues]
+        data, version = _STORE.data, _STORE.version
+    # The unit check groups the whole frame, so it runs once per data version, not per rerun.
+    reports = [r for r in reports + [_unit_issues(data, version)] if not r.empty]
+    return pd.concat(reports, ignore_index=True) if reports else pd.DataFrame(columns=ISSUE_COLUMNS)
+
+def data_version():
+    """Fingerprint of the session files behind this run's load_all_sessions call.
+
+    Derived caches take it as their key instead of hashing the frame.
+    """
+    return getattr(_loaded, "version", None) or _STORE.version
+
+# -------------------------------
+# Live updates
+# -------------------------------
+# A background thread polls the session folder and ingests new or edited
+# files off the script thread; open pages rerun when it has new data.
+# Set SPEED_JOURNAL_WATCH=0 to turn it off.
+WATCH_ENV = "SPEED_JOURNAL_WATCH"
+WATCH_INTERVAL = 2.0   # seconds between polls (and between page checks)
+
+class SessionWatcher:
+    """Polls `store` and refreshes it in a daemon thread, bumping `generation` on new data.
+
+    A change is only ingested once the folder has looked the same for two
+    polls in a row, so a CSV that is still being copied in is not read
+    half-written. A folder state that failed to ingest is remembered and
+    skipped until something in it changes again.
+    """
+
+    def __init__(self, store, interval=WATCH_INTERVAL):
+        self.store = store
+        self.interval = interval
+        self.generation = 0
+        self.last_error = None
+        self._failed = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="session-watcher", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        pending = None
+        while not self._stop.wait(self.interval):
+            pending = self.poll(pending)
+
+    def poll(self, pending=None):
+        """One watch step; returns the signatures waiting to settle (or None)."""
+        try:
+            signatures = self.store.scan()
+        except OSError as exc:
+            self.last_error = f"{type(exc).__name__}: {exc}"
+            return None
+        if signature_version(signatures) == self.store.version or signatures == self._failed:
+            return None
+        if signatures != pending:
+            return signatures        # changed since the last poll: wait for it to settle
+        try:
+            self.store.refresh(signatures)
+        except (OSError, ValueError) as exc:   # parse errors are ValueErrors
+            self.last_error = f"{type(exc).__name__}: {exc}"
+            self._failed = signatures     # don't re-read the same broken files every other poll
+            return None
+        self.last_error = None
+        self._failed = None
+        self.generation += 1
+        return None
+
+@st.cache_resource(show_spinner=False)
+def _session_watcher():
+    store = DatabaseStore(_STORE, _session_db()) if using_sqlite() else _STORE
+    return SessionWatcher(store).start()
+
+@st.fragment(run_every=WATCH_INTERVAL)
+def _rerun_on_new_data():
+    generation = _session_watcher().generation
+    seen = st.session_state.setdefault("_seen_generation", generation)
+    if generation != seen:
+        st.session_state["_seen_generation"] = generation
+        st.rerun()
+
+def live_updates():
+    """Start the watcher (once per process) and rerun this page when it ingests new files."""
+    if os.environ.get(WATCH_ENV, "1").lower() in ("0", "false", "no"):
+        return
+    if get_script_run_ctx(suppress_warning=True) is None:
+        return
+    _rerun_on_new_data()
+
+# -------------------------------
+# SQLite backend
+# -------------------------------
+# With SPEED_JOURNAL_BACKEND=sqlite the session files are ingested into an
+# on-disk SQLite database (append-only per file, indexed on metric, athlete
+# and date) instead of being combined into one frame. load_all_sessions()
+# hands out a DatabaseSessions handle, and the sidebar options, metric
+# dimensions, personal bests, progression rows, Home and the athlete charts
+# are answered with SQL, so a process only holds the rows a page shows.
+BACKEND_ENV = "SPEED_JOURNAL_BACKEND"
+SQLITE_PATH = CACHE_DIR / "sessions.sqlite"
+# Bump whenever the tables change; an older database is rebuilt from the CSVs.
+SQLITE_FORMAT = 2
+
+SQL_COLUMNS = {
+    "season_phase": "TEXT", "week_number": "INTEGER", "day_in_week": "TEXT", "date": "TEXT",
+    "year": "INTEGER", "metric_category": "TEXT", "metric_family": "TEXT", "metric_name": "TEXT",
+    "metric_id": "TEXT", "input_unit": "TEXT", "display_unit": "TEXT", "conversion_formula": "TEXT",
+    "athlete_name": "TEXT", "gender": "TEXT", "grade": "INTEGER", "input_value": "REAL",
+    "display_value": "REAL", "attempt_number": "INTEGER", "notes": "TEXT", "jitter": "REAL",
+}
+# Rows are ordered by (file, file_row): file names sort like the paths
+# SessionStore combines and file_row is the row's position in its file, so
+# of several tied rows SQL picks the one the combined frame would, however
+# often a file has been re-ingested.
+SQL_ORDER = "file, file_row"
+
+def using_sqlite():
+    return os.environ.get(BACKEND_ENV, "memory").lower() == "sqlite"
+
+def _sql_values(values):
+    # sqlite3 only binds plain Python scalars
+    return [v.item() if isinstance(v, np.generic) else v for v in values]
+
+def _sql_rows(frame, columns):
+    """`frame` reindexed to `columns` as plain Python values (None for missing)."""
+    rows = frame.reindex(columns=columns).astype(object)
+    return rows.where(rows.notna(), None)
+
+class SessionDatabase:
+    """Session rows in SQLite, kept in step with the CSV folder one file at a time."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.version = None
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        columns = ", ".join(f"{name} {kind}" for name, kind in SQL_COLUMNS.items())
+        with self._conn:
+            if self._conn.execute("PRAGMA user_version").fetchone()[0] != SQLITE_FORMAT:
+                for table in ["files", "sessions", "issues"]:
+                    self._conn.execute(f"DROP TABLE IF EXISTS {table}")
+                self._conn.execute(f"PRAGMA user_version = {SQLITE_FORMAT}")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS files (name TEXT PRIMARY KEY, digest TEXT, rows INTEGER)")
+            self._conn.execute(f"CREATE TABLE IF NOT EXISTS sessions "
+                               f"(seq INTEGER PRIMARY KEY, file TEXT, file_row INTEGER, {columns})")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS issues "
+                               "(file TEXT, line INTEGER, field TEXT, value, problem TEXT)")   # value keeps its type
+            self._conn.execute("CREATE INDEX IF NOT EXISTS sessions_metric_athlete_date "
+                               "ON sessions (metric_name, athlete_name, date)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS sessions_file ON sessions (file, file_row)")
+
+    def sync(self, signatures, workers=None):
+        """Ingest new or changed files and drop removed ones; returns the names ingested."""
+        current = {Path(sig.path).name: sig for sig in signatures}
+        with self._lock, self._conn:
+            known = dict(self._conn.execute("SELECT name, digest FROM files"))
+            for name in set(known) - set(current):
+                for table, col in [("sessions", "file"), ("issues", "file"), ("files", "name")]:
+                    self._conn.execute(f"DELETE FROM {table} WHERE {col} = ?", (name,))
+            changed = [sig for name, sig in current.items() if known.get(name) != sig.digest]
+            parsed = _read_session_files([sig.path for sig in changed], workers or parse_workers())
+            ingested = []
+            for sig, (frame, issues) in zip(changed, parsed):
+                name = Path(sig.path).name
+                if "date" in frame.columns:
+                    frame = frame.assign(date=frame["date"].dt.strftime("%Y-%m-%d"))
+                rows = _sql_rows(frame, list(SQL_COLUMNS))
+                for table in ["sessions", "issues"]:
+                    self._conn.execute(f"DELETE FROM {table} WHERE file = ?", (name,))
+                self._conn.executemany(
+                    f"INSERT INTO sessions (file, file_row, {', '.join(SQL_COLUMNS)}) "
+                    f"VALUES (?, ?, {', '.join('?' * len(SQL_COLUMNS))})",
+                    ((name, i, *_sql_values(row)) for i, row in enumerate(rows.itertuples(index=False))),
+                )
+                # Through JSON like the snapshot manifest, so values read back as they do from there
+                issues = pd.DataFrame(json.loads(issues.to_json(orient="records")), columns=ISSUE_COLUMNS)
+                self._conn.executemany(
+                    "INSERT INTO issues VALUES (?, ?, ?, ?, ?)",
+                    (_sql_values(row) for row in _sql_rows(issues, ISSUE_COLUMNS).itertuples(index=False)),
+                )
+                self._conn.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?)", (name, sig.digest, len(frame)))
+                ingested.append(name)
+        self.version = signature_version(signatures)
+        return ingested
+
+    def read(self, sql, params=()):
+        with self._lock:
+            return pd.read_sql_query(sql, self._conn, params=params)
+
+    def query(self, sql, params=()):
+        return normalize_sessions(self.read(sql, params))
+
+    def count(self):
+        return int(self.read("SELECT COUNT(*) AS n FROM sessions")["n"].iloc[0])
+
+    @staticmethod
+    def _where(filters=None, metrics=None, gender=None, athlete=None, prefix=""):
+        """WHERE clause and params; `prefix` qualifies the columns (e.g. "s.") in joins."""
+        clauses, params = [f"{prefix}display_value IS NOT NULL"], []
+
+        def isin(col, values):
+            clauses.append(f"{prefix}{col} IN ({', '.join('?' * len(values))})")
+            params.extend(_sql_values(values))
+
+        if filters is not None:
+            for field, col in FilterEngine.COLUMNS.items():
+                if getattr(filters, field):
+                    isin(col, list(getattr(filters, field)))
+            clauses.append(f"{prefix}week_number BETWEEN ? AND ?")
+            params.extend(int(w) for w in filters.week_range)
+        if metrics is not None:
+            isin("metric_name", list(metrics))
+        if gender is not None:
+            isin("gender", [gender])
+        if athlete is not None:
+            isin("athlete_name", [athlete])
+        return " AND ".join(clauses), params
+
+    @staticmethod
+    def _first_rows(partition, columns, where):
+        """The first row (in SQL_ORDER) per `partition` value among rows matching `where`."""
+        return f"""
+            SELECT {columns}, file, file_row FROM (
+                SELECT {columns}, file, file_row,
+                       ROW_NUMBER() OVER (PARTITION BY {partition} ORDER BY {SQL_ORDER}) AS k
+                FROM sessions WHERE {where}
+            ) WHERE k = 1
+        """
+
+    @classmethod
+    def _directions(cls):
+        # Metric direction from the first display unit recorded for each metric
+        # (what build_metric_dimensions() picks), as +1 (higher is better) or -1.
+        units = ", ".join(f"'{u}'" for u in sorted(LOWER_IS_BETTER_UNITS))
+        first = cls._first_rows("metric_name", "metric_name, display_unit", "display_unit IS NOT NULL")
+        return f"""
+            SELECT metric_name,
+                   CASE WHEN lower(trim(display_unit)) IN ({units}) THEN -1.0 ELSE 1.0 END AS sign
+            FROM ({first})
+        """
+
+    def options(self, col):
+        """Distinct non-null values of `col` in first-seen order, like FilterEngine.options()."""
+        first = self._first_rows(col, col, f"{col} IS NOT NULL")
+        return self.read(f"SELECT {col} FROM ({first}) ORDER BY {SQL_ORDER}")[col].tolist()
+
+    def week_extent(self):
+        """(lowest, highest) week number, or None when no row has one."""
+        lo, hi = self.read("SELECT MIN(week_number) AS lo, MAX(week_number) AS hi FROM sessions").iloc[0]
+        return None if pd.isna(lo) else (int(lo), int(hi))
+
+    def metric_dimensions(self):
+        """Category, family and units per metric_name: the first non-null value of each, as groupby().first() gives."""
+        names = sorted(self.options("metric_name"))
+        dims = pd.DataFrame(index=pd.Index(names, name="metric_name"))
+        for col in ["metric_category", "metric_family", "display_unit", "input_unit"]:
+            first = self.read(self._first_rows("metric_name", f"metric_name, {col}",
+                                               f"metric_name IS NOT NULL AND {col} IS NOT NULL"))
+            dims[col] = first.set_index("metric_name")[col].reindex(dims.index)
+        return dims.astype(object)
+
+    def metric_units(self):
+        """Distinct (metric, display unit, input unit) combinations, enough for unit_issues()."""
+        return self.query("SELECT DISTINCT metric_name, display_unit, input_unit FROM sessions")
+
+    def issues(self):
+        """Every file's validate_sessions() report, in file order."""
+        report = self.read('SELECT file, line, field AS "column", value, problem FROM issues ORDER BY file, rowid')
+        return report.astype({"line": "Int64"})
+
+    def personal_bests(self, filters=None):
+        """Best row per PB_KEYS group, best first, like personal_best_index()."""
+        where, params = self._where(filters, prefix="s.")
+        partition = ", ".join(f"s.{key}" for key in PB_KEYS)
+        # Equal scores come out in group-key order (missing keys last), as rank_athletes() sorts them
+        key_order = ", ".join(f"{key} IS NULL, {key}" for key in PB_KEYS)
+        pbs = self.query(f"""
+            WITH dirs AS ({self._directions()}),
+            ranked AS (
+                SELECT s.*, s.display_value * coalesce(d.sign, 1.0) AS score,
+                       ROW_NUMBER() OVER (PARTITION BY {partition}
+                                          ORDER BY s.display_value * coalesce(d.sign, 1.0) DESC,
+                                                   s.file, s.file_row) AS pick
+                FROM sessions s LEFT JOIN dirs d ON d.metric_name = s.metric_name
+                WHERE {where}
+            )
+            SELECT {", ".join(PB_COLUMNS)} FROM ranked WHERE pick = 1 ORDER BY score DESC, {key_order}
+        """, params)
+        return pbs[PB_COLUMNS]
+
+    def session_rows(self, filters=None, metrics=None, gender=None, athlete=None):
+        """Attempts matching `filters` for the given metrics (e.g. one progression view) or athlete."""
+        where, params = self._where(filters, metrics, gender, athlete)
+        return self.query(f"SELECT {', '.join(SQL_COLUMNS)} FROM sessions WHERE {where} ORDER BY {SQL_ORDER}", params)
+
+    def season_rows(self, year):
+        """Every attempt dated in `year`, recorded value or not (what HomeSummary counts)."""
+        return self.query(f"SELECT {', '.join(SQL_COLUMNS)} FROM sessions WHERE year = ? ORDER BY {SQL_ORDER}",
+                          (int(year),))
+
+    def athlete_metrics(self):
+        """(athlete, metric) pairs with at least one dated value, sorted like AthleteSeries' slices."""
+        pairs = self.read("SELECT DISTINCT athlete_name, metric_name FROM sessions "
+                          "WHERE date IS NOT NULL AND display_value IS NOT NULL "
+                          "AND athlete_name IS NOT NULL AND metric_name IS NOT NULL "
+                          "ORDER BY athlete_name, metric_name")
+        return list(pairs.itertuples(index=False, name=None))
+
+    def to_frame(self):
+        """Every attempt, in combined-frame order (for batch jobs like the static site)."""
+        return self.query(f"SELECT {', '.join(SQL_COLUMNS)} FROM sessions ORDER BY {SQL_ORDER}")
+
+class DatabaseSessions:
+    """What load_all_sessions() returns on the sqlite backend in place of the frame.
+
+    Pages only check `empty` and pass it back into utils, where every
+    function that takes `data` queries the database instead.
+    """
+
+    columns = list(SQL_COLUMNS)
+
+    def __init__(self, db, n_rows):
+        self.db = db
+        self.n_rows = n_rows
+
+    def __len__(self):
+        return self.n_rows
+
+    @property
+    def empty(self):
+        return self.n_rows == 0
+
+def session_frame(data):
+    """`data` as a DataFrame, reading every attempt back out of the database on the sqlite backend."""
+    return data.db.to_frame() if isinstance(data, DatabaseSessions) else data
+
+class DatabaseStore:
+    """SessionWatcher's store on the sqlite backend: scans with `store`, ingests into `db`."""
+
+    def __init__(self, store, db):
+        self.store = store
+        self.db = db
+
+    @property
+    def version(self):
+        return self.db.version
+
+    def scan(self):
+        return self.store.scan()
+
+    def refresh(self, signatures):
+        self.db.sync(signatures)
+
+class DatabaseFilterOptions:
+    """The part of FilterEngine the sidebar and export use (options, week extent), from SQL."""
+
+    def __init__(self, db):
+        self._options = {col: db.options(col) for col in FilterEngine.COLUMNS.values()}
+        self.week_extent = db.week_extent() or (0, 52)
+
+    def options(self, col, sort=False):
+        values = list(self._options.get(col, []))
+        return sorted(values) if sort else values
+
+class DatabaseAthleteSeries:
+    """AthleteSeries over the database: an athlete's sessions are read when first shown, then kept (LRU)."""
+
+    def __init__(self, db, directions, window=None, max_athletes=16):
+        self.window = window or ROLLING_SESSIONS
+        self.directions = directions
+        self._db = db
+        self._series = LRUCache(max_athletes)
+        self._metrics = {}
+        for athlete, metric in db.athlete_metrics():
+            self._metrics.setdefault(athlete, []).append(metric)
+
+    def athletes(self):
+        return list(self._metrics)
+
+    def metrics(self, athlete):
+        return self._metrics.get(athlete, [])
+
+    def get(self, athlete, metric, filters=None):
+        series = self._series.get(athlete)
+        if series is None:
+            rows = self._db.session_rows(athlete=athlete)
+            series = self._series.put(athlete, AthleteSeries(rows, self.directions, self.window))
+        return series.get(athlete, metric, filters)
+
+@st.cache_resource(show_spinner=False)
+def _session_db():
+    return SessionDatabase(SQLITE_PATH)
+
+@profiled(st.cache_resource(show_spinner=False, max_entries=2))
+def _load_database(signatures):
+    db = _session_db()
+    with timed("sqlite sync"):
+        db.sync(signatures)
+    return DatabaseSessions(db, db.count()), [sig.path for sig in signatures]
+
+@profiled(st.cache_resource(show_spinner=False, max_entries=2))
+def _sql_session_issues(version):
+    db = _session_db()
+    reports = [r for r in [db.issues(), unit_issues(db.metric_units())] if not r.empty]
+    return pd.concat(reports, ignore_index=True) if reports else pd.DataFrame(columns=ISSUE_COLUMNS)
+
+@profiled(st.cache_resource(show_spinner=False, max_entries=2))
+def _sql_filter_options(version):
+    return DatabaseFilterOptions(_session_db())
+
+@profiled(st.cache_resource(show_spinner=False, max_entries=2))
+def _sql_metric_dimensions(version):
+    return _derive_metric_dimensions(_session_db().metric_dimensions())
+
+@profiled(st.cache_resource(show_spinner=False, max_entries=8))
+def _sql_personal_bests(version, filters):
+    return _session_db().personal_bests(filters)
+
+@profiled(st.cache_resource(show_spinner=False, max_entries=2))
+def _sql_athlete_series(version):
+    return DatabaseAthleteSeries(_session_db(), _sql_metric_dimensions(version)["direction"])
+
+@profiled(st.cache_resource(show_spinner=False, max_entries=4))
+def _sql_home_summary(version, year):
+    db = _session_db()
+    return HomeSummary(db.season_rows(year), _sql_personal_bests(version, None),
+                       _sql_metric_dimensions(version)["direction"], year)
+
+class Filters(NamedTuple):
+    top_n: int
+    years: list
+    athletes: list
+    metrics: list
+    phases: list
+    grades: list
+    week_range: tuple
+    show_gender_split: bool
+    genders: list
+
+class FilterEngine:
+    """Sidebar filtering over one data version.
+
+    Each filter column is factorized once; a selection becomes a boolean
+    lookup table gathered through the codes, cached per (column, selection)
+    with LRU eviction, and active masks are combined with `&`.
+    """
+
+    COLUMNS = {
+        "athletes": "athlete_name", "metrics": "metric_name", "phases": "season_phase",
+        "genders": "gender", "years": "year", "grades": "grade",
+    }
+
+    def __init__(self, data, max_masks=64):
+        self.n_rows = len(data)
+        self._codes = {}
+        self._uniques = {}
+        for col in [*self.COLUMNS.values(), "week_number"]:
+            if col in data.columns:
+                codes, uniques = pd.factorize(data[col])
+                self._codes[col] = codes.astype(np.int32)
+                self._uniques[col] = uniques
+        weeks = self._uniques.get("week_number", pd.Index([]))
+        self.week_extent = (int(weeks.min()), int(weeks.max())) if len(weeks) else (0, 52)
+        self._missing_weeks = "week_number" in self._codes and bool((self._codes["week_number"] < 0).any())
+        self._masks = LRUCache(max_masks)
+
+    def options(self, col, sort=False):
+        """Distinct non-null values of `col` (first-seen order unless `sort`)."""
+        values = pd.Index(self._uniques.get(col, [])).tolist()
+        return sorted(values) if sort else values
+
+    def mask(self, col, selected):
+        key = (col, frozenset(selected))
+        cached = self._masks.get(key)
+        if cached is not None:
+            return cached
+
+        uniques = self._uniques[col]
+        lut = np.zeros(len(uniques) + 1, dtype=bool)   # last slot catches missing (-1) codes
+        positions = uniques.get_indexer(list(selected))
+        lut[positions[positions >= 0]] = True
+        return self._masks.put(key, lut[self._codes[col]])
 
-def apply_filters(data):
+    def week_filtered(self, filters):
+        """Whether the week range drops any rows (rows without a week never pass)."""
+        return "week_number" in self._codes and \
+            (tuple(filters.week_range) != self.week_extent or self._missing_weeks)
+
+    def rows(self, filters):
+        """Positions of the rows passing `filters`, or None when nothing is filtered out."""
+        masks = [
+            self.mask(col, getattr(filters, field))
+            for field, col in self.COLUMNS.items()
+            if getattr(filters, field) and col in self._codes
+        ]
+        if self.week_filtered(filters):
+            lo, hi = filters.week_range
+            weeks = [w for w in self._uniques["week_number"] if lo <= w <= hi]
+            masks.append(self.mask("week_number", weeks))
+        if not masks:
+            return None
+        return np.flatnonzero(np.logical_and.reduce(masks))
+
+@profiled(st.cache_resource(show_spinner=False, max_entries=2))
+def _filter_engine(_data, version):
+    return FilterEngine(_data)
+
+def filter_engine(data):
+    if using_sqlite():
+        return _sql_filter_options(data_version())
+    return _filter_engine(data, data_version())
+
+def sidebar_filters(data):
+    engine = filter_engine(data)
     st.sidebar.header("Filters")
 
     # Leaderboard size
@@ -30,37 +1323,25 @@ def apply_filters(data):
     )
 
     # Year filter
-    if "date" in data.columns:
-        data["date"] = pd.to_datetime(data["date"], errors="coerce")
-        data["year"] = data["date"].dt.year
-        year_options = sorted(data["year"].dropna().unique())
-        year_filter = st.sidebar.multiselect("Select Year(s)", options=year_options)
+    if "year" in data.columns:
+        year_filter = st.sidebar.multiselect("Select Year(s)", options=engine.options("year", sort=True))
     else:
         year_filter = []
         st.sidebar.info("No date column found in dataset.")
 
-    athlete_filter = st.sidebar.multiselect("Select Athlete(s)", options=data['athlete_name'].unique())
-    metric_filter = st.sidebar.multiselect("Select Metric(s)", options=data['metric_name'].unique())
-    season_phase_filter = st.sidebar.multiselect("Season Phase(s)", options=data['season_phase'].unique())
+    athlete_filter = st.sidebar.multiselect("Select Athlete(s)", options=engine.options("athlete_name"))
+    metric_filter = st.sidebar.multiselect("Select Metric(s)", options=engine.options("metric_name"))
+    season_phase_filter = st.sidebar.multiselect("Season Phase(s)", options=engine.options("season_phase"))
 
     # Grade filter
     if "grade" in data.columns:
-        grade_options = sorted(data['grade'].dropna().unique())
-        grade_filter = st.sidebar.multiselect("Select Grade(s)", options=grade_options)
+        grade_filter = st.sidebar.multiselect("Select Grade(s)", options=engine.options("grade", sort=True))
     else:
         grade_filter = []
         st.sidebar.info("No grade column found in dataset.")
 
     # Week filter
-    if "week_number" in data.columns:
-        try:
-            data["week_number"] = pd.to_numeric(data["week_number"], errors="coerce").astype("Int64")
-        except Exception:
-            pass
-
-    week_min = int(data['week_number'].min()) if "week_number" in data.columns and pd.notna(data['week_number'].min()) else 0
-    week_max = int(data['week_number'].max()) if "week_number" in data.columns and pd.notna(data['week_number'].max()) else 52
-
+    week_min, week_max = engine.week_extent
     week_range = st.sidebar.slider(
         "Week Number Range", min_value=week_min, max_value=week_max, value=(week_min, week_max)
     )
@@ -68,62 +1349,606 @@ def apply_filters(data):
     show_gender_split = st.sidebar.checkbox("Show Gender-Split Leaderboards", value=True)
 
     if "gender" in data.columns:
-        gender_options = data['gender'].unique()
-        gender_filter = st.sidebar.multiselect("Gender", options=gender_options)
+        gender_filter = st.sidebar.multiselect("Gender", options=engine.options("gender"))
     else:
         gender_filter = []
         st.sidebar.info("No gender column found in dataset.")
 
-    # Apply filters
-    filtered = data[
-        (data['athlete_name'].isin(athlete_filter) if athlete_filter else True) &
-        (data['metric_name'].isin(metric_filter) if metric_filter else True) &
-        (data['season_phase'].isin(season_phase_filter) if season_phase_filter else True) &
-        (data['week_number'].between(*week_range)) &
-        (data['gender'].isin(gender_filter) if ("gender" in data.columns and gender_filter) else True) &
-        (data['year'].isin(year_filter) if year_filter else True) &
-        (data['grade'].isin(grade_filter) if grade_filter else True)
-    ].copy()
+    return Filters(top_n, year_filter, athlete_filter, metric_filter, season_phase_filter,
+                   grade_filter, week_range, show_gender_split, gender_filter)
 
-    return filtered, top_n, show_gender_split
+def filter_rows(data, filters):
+    """Row positions passing `filters` (None means every row), from the cached masks."""
+    return filter_engine(data).rows(filters)
 
-# chart rendering function (copied from your original, unchanged)
-def render_chart(df, title_suffix="", gendered=False, label="Metric", unit="", input_unit="", ascending=True):
-    df = df.copy().reset_index(drop=True)
-    df = df.sort_values("display_value", ascending=not ascending).reset_index(drop=True)
-    df["rank"] = range(len(df))
+def filter_sessions(data, filters):
+    with timed("filter"):
+        rows = filter_rows(data, filters)
+        # No filters: hand back the shared frame itself rather than a copy.
+        return data if rows is None else data.take(rows)
 
-    display_unit = unit
-    input_unit = input_unit
+# -------------------------------
+# Ranking
+# -------------------------------
+LOWER_IS_BETTER_UNITS = {"s", "sec", "seconds"}
 
-    # Table renaming
-    df_renamed = df.rename(columns={
-        "display_value": f"Output ({display_unit})",
-        "input_value": f"Input ({input_unit})"
+def direction_for_unit(unit):
+    """"min" when a lower value is better (times), otherwise "max"."""
+    return "min" if str(unit).strip().lower() in LOWER_IS_BETTER_UNITS else "max"
+
+def build_metric_dimensions(data):
+    """One row per metric_name: category, family, build distance, bucket, units, direction.
+
+    Everything here depends only on the metric, so it is computed over the
+    distinct names instead of per row, then joined back by category code.
+    """
+    dims = data.groupby("metric_name", observed=True)[
+        ["metric_category", "metric_family", "display_unit", "input_unit"]
+    ].first().astype(object)
+    return _derive_metric_dimensions(dims)
+
+def _derive_metric_dimensions(dims):
+    """Add build distance, bucket and direction to a per-metric category/family/units table."""
+    names = dims.index.to_series().astype(str)
+    build = pd.to_numeric(names.str.extract(r"^(\d+)\s*-\s*\d+", expand=False), errors="coerce").fillna(0)
+    dims["build"] = build.astype(int)
+    dims["bucket"] = np.select([build <= 18, build <= 35], MAXV_BUCKETS[:2], MAXV_BUCKETS[2])
+    dims["direction"] = dims["display_unit"].map(direction_for_unit)
+    return dims
+
+@profiled(st.cache_resource(show_spinner=False, max_entries=8))
+def _metric_dimensions(_data, version):
+    return build_metric_dimensions(_data)
+
+def metric_dimensions(data):
+    if using_sqlite():
+        return _sql_metric_dimensions(data_version())
+    return _metric_dimensions(data, data_version())
+
+def metric_directions(data):
+    return metric_dimensions(data)["direction"]
+
+def metric_attribute(df, values):
+    """Look up a per-metric Series (indexed by metric_name) for every row of `df` via its category codes."""
+    names = df["metric_name"]
+    lookup = values.reindex(names.cat.categories).to_numpy()
+    lookup = np.append(lookup, np.array([None], dtype=lookup.dtype) if lookup.dtype == object else np.nan)
+    return pd.Series(lookup[names.cat.codes.to_numpy()], index=df.index)
+
+def _scores(df, directions):
+    """display_value signed per metric direction, so larger is always better."""
+    sign = np.where(metric_attribute(df, directions).eq("min").to_numpy(), -1.0, 1.0)
+    return pd.Series(df["display_value"].to_numpy(dtype="float64") * sign, index=df.index)
+
+def rank_athletes(df, directions, top_n=None, by=("athlete_name",)):
+    """Best row per `by` group (min or max per the metric's direction), best first.
+
+    The per-group best is a hash groupby and the top N a partial selection,
+    so nothing sorts every athlete's best just to keep a handful of rows.
+    """
+    df = df[df["display_value"].notna()]
+    if df.empty:
+        return df
+    score = _scores(df, directions)
+    best = score.groupby([df[c] for c in by], observed=True, dropna=False).idxmax()
+    best_scores = score.loc[best.to_numpy()]
+    if top_n is None:
+        order = best_scores.sort_values(ascending=False, kind="stable").index
+    else:
+        order = best_scores.nlargest(top_n).index
+    return df.loc[order]
+
+# -------------------------------
+# Personal bests
+# -------------------------------
+# One row per (metric, athlete, gender, grade, year): any leaderboard over a
+# set of metrics, grades or years is a best-of-bests over these rows.
+PB_KEYS = ["metric_name", "athlete_name", "gender", "grade", "year"]
+PB_COLUMNS = PB_KEYS + [
+    "metric_category", "metric_family", "display_value", "input_value",
+    "display_unit", "input_unit", "date",
+]
+
+# The performance cube adds season phase to the keys: one best row per
+# (metric, athlete, gender, grade, year, phase) cell. A phase, grade band or
+# any other sidebar combination except the week range is a best-of-bests
+# over a few thousand cells instead of a pass over every attempt.
+CUBE_KEYS = PB_KEYS + ["season_phase"]
+
+class PerformanceCube:
+    """Best row per CUBE_KEYS cell, kept in the attempts' original order.
+
+    Because each cell holds the first of its tied best rows and cells stay in
+    row order, ranking cells picks exactly the row (and tie order) that
+    ranking the attempts would.
+    """
+
+    def __init__(self, data, directions):
+        self.directions = directions
+        keys = [c for c in CUBE_KEYS if c in data.columns]
+        cells = rank_athletes(data, directions, by=keys).sort_index()
+        self.cells = cells[[c for c in PB_COLUMNS + ["season_phase"] if c in cells.columns]].reset_index(drop=True)
+        self._engine = FilterEngine(self.cells)
+        self.index = self.best(by=[c for c in PB_KEYS if c in self.cells.columns])
+
+    def extend(self, rows, directions):
+        """The cube for this cube's attempts followed by `rows`, ranked from the cells plus `rows` only.
+
+        The cells already hold each cell's first best row in row order, so
+        re-ranking them together with the appended rows picks what a full
+        rebuild would. `directions` must agree with this cube's for its metrics.
+        """
+        return PerformanceCube(_concat_sessions([self.cells, rows[list(self.cells.columns)]]), directions)
+
+    def select(self, filters=None):
+        """Cells passing `filters` (the week range is not a cube dimension)."""
+        rows = self._engine.rows(filters) if filters is not None else None
+        return self.cells if rows is None else self.cells.take(rows)
+
+    def best(self, filters=None, by=PB_KEYS, top_n=None):
+        """Best-of-bests per `by` group over the cells passing `filters`, best first."""
+        ranked = rank_athletes(self.select(filters), self.directions, top_n=top_n, by=by)
+        return ranked[[c for c in PB_COLUMNS if c in ranked.columns]].reset_index(drop=True)
+
+    def personal_bests(self, filters=None):
+        """PB_KEYS rows passing `filters`; only a phase filter needs re-ranking cells."""
+        if filters is None:
+            return self.index
+        if filters.phases:
+            return self.best(filters)
+        mask = pd.Series(True, index=self.index.index)
+        for col, selected in [("athlete_name", filters.athletes), ("metric_name", filters.metrics),
+                              ("gender", filters.genders), ("year", filters.years), ("grade", filters.grades)]:
+            if selected:
+                mask &= self.index[col].isin(selected)
+        return self.index[mask]
+
+# The latest cubes by data version. When a version only appended files
+# (the weekly drop, or the watcher ingesting one), its cube extends the
+# previous version's instead of re-ranking every attempt.
+_CUBES = LRUCache(2)
+
+@profiled(st.cache_resource(show_spinner=False, max_entries=2))
+def _performance_cube(_data, version):
+    directions = build_metric_dimensions(_data)["direction"]
+    base = _STORE.appended_to(version)
+    previous = _CUBES.get(base[0]) if base else None
+    if previous is not None and directions.reindex(previous.directions.index).equals(previous.directions):
+        with timed("performance cube (extend)"):
+            cube = previous.extend(_data.iloc[base[1]:], directions)
+    else:
+        cube = PerformanceCube(_data, directions)
+    return _CUBES.put(version, cube)
+
+def performance_cube(data):
+    return _performance_cube(data, data_version())
+
+@profiled(st.cache_resource(show_spinner=False, max_entries=8))
+def personal_best_index(_data, key):
+    """Personal-best rows for `_data`; `key` identifies it (data version plus any row filters)."""
+    index = rank_athletes(_data, build_metric_dimensions(_data)["direction"], by=PB_KEYS)
+    return index[[c for c in PB_COLUMNS if c in index.columns]].reset_index(drop=True)
+
+def personal_bests(data, filters=None):
+    """Personal-best rows for `data` restricted to `filters`.
+
+    Everything but the week range is answered from the performance cube;
+    weeks are not a cube dimension, so a week range falls back to one pass
+    over the rows.
+    """
+    version = data_version()
+    # Only the fields that pick rows belong in the cache key; moving the
+    # top-N slider or the gender-split toggle must not re-rank anything.
+    if filters is not None:
+        filters = filters._replace(top_n=None, show_gender_split=None)
+    if using_sqlite():
+        return _sql_personal_bests(version, filters)
+    if filters is not None and filter_engine(data).week_filtered(filters):
+        return personal_best_index(filter_sessions(data, filters), (version, filters))
+    return performance_cube(data).personal_bests(filters)
+
+# -------------------------------
+# Athlete series
+# -------------------------------
+# One row per (athlete, metric, session date), sorted so each athlete/metric
+# pair is a contiguous slice; rolling stats are computed for every series in
+# one grouped pass instead of re-filtering the table per athlete. Year,
+# week, phase and grade ride along so a slice can honour the sidebar filters.
+ROLLING_SESSIONS = 3
+SERIES_COLUMNS = [
+    "athlete_name", "metric_name", "date", "year", "week_number", "season_phase", "grade",
+    "display_value", "display_unit", "rolling_best", "rolling_mean",
+]
+
+class AthleteSeries:
+    """Per-athlete, per-metric session-best series with O(1) lookup of each slice."""
+
+    def __init__(self, data, directions, window=ROLLING_SESSIONS):
+        self.window = window
+        self.directions = directions
+        best = rank_athletes(data[data["date"].notna()], directions, by=("athlete_name", "metric_name", "date"))
+        best = best.sort_values(["athlete_name", "metric_name", "date"], kind="stable").reset_index(drop=True)
+        series_id = best.groupby(["athlete_name", "metric_name"], observed=True, sort=False).ngroup()
+
+        # Best-so-far on the signed score, so "min" metrics roll downwards.
+        value = best["display_value"].astype("float64")
+        sign = np.where(metric_attribute(best, directions).eq("min").to_numpy(), -1.0, 1.0)
+        running = (value * sign).groupby(series_id).cummax()
+        best["rolling_best"] = running * sign
+
+        # Trailing mean over the last `window` sessions via a grouped cumulative sum.
+        position = best.groupby(series_id).cumcount()
+        total = value.groupby(series_id).cumsum()
+        lagged = total.groupby(series_id).shift(window).fillna(0.0)
+        best["rolling_mean"] = (total - lagged) / np.minimum(position + 1, window)
+
+        self.frame = best[[c for c in SERIES_COLUMNS if c in best.columns]]
+        starts = np.flatnonzero(np.diff(series_id.to_numpy(), prepend=-1))
+        stops = np.append(starts[1:], len(best))
+        keys = zip(best["athlete_name"].to_numpy()[starts], best["metric_name"].to_numpy()[starts])
+        self._slices = {key: (start, stop) for key, start, stop in zip(keys, starts, stops)}
+        self._metrics = {}
+        for athlete, metric in self._slices:
+            self._metrics.setdefault(athlete, []).append(metric)
+
+    def athletes(self):
+        return list(self._metrics)
+
+    def metrics(self, athlete):
+        return self._metrics.get(athlete, [])
+
+    def get(self, athlete, metric, filters=None):
+        """The series for one athlete and metric, oldest session first.
+
+        With `filters`, only sessions passing the year, grade, phase and week
+        selections are kept (rows without a week drop out, as in
+        FilterEngine); best to date and the rolling mean still count every
+        session.
+        """
+        start, stop = self._slices.get((athlete, metric), (0, 0))
+        rows = self.frame.iloc[start:stop]
+        if filters is None:
+            return rows
+        mask = rows["week_number"].between(*filters.week_range).fillna(False).to_numpy(dtype=bool)
+        for col, selected in [("year", filters.years), ("grade", filters.grades), ("season_phase", filters.phases)]:
+            if selected and col in rows.columns:
+                mask &= rows[col].isin(selected).to_numpy()
+        return rows[mask]
+
+@profiled(st.cache_resource(show_spinner=False, max_entries=2))
+def _athlete_series(_data, version):
+    return AthleteSeries(_data, build_metric_dimensions(_data)["direction"])
+
+def athlete_series(data):
+    if using_sqlite():
+        return _sql_athlete_series(data_version())
+    return _athlete_series(data, data_version())
+
+# -------------------------------
+# Views
+# -------------------------------
+# Leaderboards and Progression share one navigation tree:
+# category -> family tab -> leaf. Categories without an entry in
+# VIEW_FAMILIES list their metrics directly.
+CATEGORY_ORDER = ["Speed", "X-Factor", "Lactic"]
+MAXV_ALL = "Max-Velocity (All Metrics)"
+MAXV_BUCKETS = ["Early-Acceleration", "Medium-Build", "Late-Velocity"]
+
+# category (lowercase) -> [(tab label, metric_family key, how leaves are split)]
+VIEW_FAMILIES = {
+    "speed": [("Max-Velocity", "maxv", "bucket"), ("Acceleration", "acceleration", "metric")],
+}
+
+class ViewSpec(NamedTuple):
+    label: str
+    category: str
+    family: str = None   # lowercase metric_family, None when the category lists metrics directly
+    bucket: str = None   # Max-Velocity build bucket (MAXV_ALL for the whole family)
+    metric: str = None
+
+def build_views(data):
+    """Category -> family tab (None if absent) -> list of ViewSpec present in `data`."""
+    present = data[["metric_category", "metric_family", "metric_name"]].drop_duplicates()
+    categories = present["metric_category"].dropna().unique().tolist()
+    categories = [c for c in CATEGORY_ORDER if c in categories] + \
+                 sorted(c for c in categories if c not in CATEGORY_ORDER)
+
+    views = {}
+    for category in categories:
+        in_category = present[present["metric_category"] == category]
+        families = VIEW_FAMILIES.get(category.lower())
+        if families is None:
+            metrics = sorted(in_category["metric_name"].dropna().unique())
+            views[category] = {None: [ViewSpec(m, category, metric=m) for m in metrics]}
+            continue
+
+        views[category] = {}
+        for family_label, family, split in families:
+            metrics = sorted(in_category.loc[
+                in_category["metric_family"].str.lower() == family, "metric_name"
+            ].dropna().unique())
+            if not metrics:
+                leaves = []
+            elif split == "bucket":
+                leaves = [ViewSpec(b, category, family=family, bucket=b) for b in [MAXV_ALL] + MAXV_BUCKETS]
+            else:
+                leaves = [ViewSpec(m, category, family=family, metric=m) for m in metrics]
+            views[category][family_label] = leaves
+    return views
+
+def select_view(views, key):
+    """Walk the view tree with lazy_tabs and return the selected ViewSpec (or None)."""
+    if not views:
+        return None
+    category = lazy_tabs(views, key=f"{key}-category")
+    families = views[category]
+    family = None
+    if list(families) != [None]:
+        family = lazy_tabs(families, key=f"{key}-{category}-family")
+    leaves = families[family]
+    if not leaves:
+        st.info(f"No {family or category} data available.")
+        return None
+    label = lazy_tabs([v.label for v in leaves], key=f"{key}-{category}-{family}")
+    return next(v for v in leaves if v.label == label)
+
+def view_rows(data, spec, dims):
+    """Rows of `data` that belong to the view; `dims` is the metric dimension table."""
+    mask = data["metric_category"] == spec.category
+    if spec.family:
+        mask &= data["metric_family"].str.lower() == spec.family
+    if spec.metric:
+        mask &= data["metric_name"] == spec.metric
+    if spec.bucket and spec.bucket != MAXV_ALL:
+        mask &= metric_attribute(data, dims["bucket"]) == spec.bucket
+    return data[mask]
+
+def view_metrics(spec, dims):
+    """Metric names that make up a view, from the metric dimension table."""
+    mask = dims["metric_category"] == spec.category
+    if spec.family:
+        mask &= dims["metric_family"].str.lower() == spec.family
+    if spec.metric:
+        mask &= dims.index == spec.metric
+    if spec.bucket and spec.bucket != MAXV_ALL:
+        mask &= dims["bucket"] == spec.bucket
+    return dims.index[mask].tolist()
+
+def progression_rows(data, filters, spec, dims):
+    """Attempts in a view passing `filters`; pushed down to SQL on the sqlite backend."""
+    if using_sqlite():
+        return _session_db().session_rows(filters, view_metrics(spec, dims))
+    return view_rows(filter_sessions(data, filters), spec, dims)
+
+# -------------------------------
+# Home summary
+# -------------------------------
+# Tables shown on Home (and in the static site). Max-Velocity (All Metrics)
+# is the whole maxv family rather than a single metric.
+HOME_METRICS = [
+    MAXV_ALL,
+    "10m Acceleration",
+    "Vertical Jump",
+    "Triple Broad Jump",
+    "Standing Triple Jump",
+    "24/28s Drill"
+]
+
+GRADE_BANDS = {
+    "Overall (9–12)": [9, 10, 11, 12],
+    "Freshman (9)": [9],
+    "Fresh-Soph (9–10)": [9, 10]
+}
+
+def format_values(rows):
+    """Display strings for `rows`, with the input value appended when it was entered in another unit."""
+    # Values are float32, so format explicitly rather than relying on repr
+    return [
+        f"{dv:.2f} {du}" + (f" ({iv:.2f} {iu})" if iu != du else "")
+        for dv, du, iv, iu in zip(rows["display_value"].tolist(), rows["display_unit"].tolist(),
+                                  rows["input_value"].tolist(), rows["input_unit"].tolist())
+    ]
+
+def metric_rows(df, metric_label):
+    if metric_label == MAXV_ALL:
+        return df[df["metric_family"].str.lower() == "maxv"]
+    return df[df["metric_name"] == metric_label]
+
+def participation(df):
+    return (
+        df.groupby("metric_name", observed=True)["athlete_name"]
+        .nunique()
+        .reset_index()
+        .rename(columns={"athlete_name": "Unique Athletes"})
+        .sort_values("Unique Athletes", ascending=False)
+    )
+
+def consistency(df, top=10):
+    return (
+        df.groupby("athlete_name", observed=True)["date"]
+        .count()
+        .reset_index()
+        .rename(columns={"date": "Sessions"})
+        .sort_values("Sessions", ascending=False)
+        .head(top)
+    )
+
+def highlight_metrics(recent, preferred=HOME_METRICS):
+    """Preferred metrics present in `recent`, each missing one swapped for the busiest remaining metric."""
+    counts = recent["metric_name"].value_counts()
+    metric_counts = counts[counts > 0].to_dict()   # categoricals also count unused metrics
+    selected_metrics = []
+    for m in preferred:
+        if m == MAXV_ALL:
+            if not metric_rows(recent, m).empty:
+                selected_metrics.append(m)
+                continue
+        elif m in metric_counts:
+            selected_metrics.append(m)
+            metric_counts.pop(m, None)
+            continue
+        if metric_counts:
+            alt_metric = max(metric_counts, key=metric_counts.get)
+            selected_metrics.append(alt_metric)
+            metric_counts.pop(alt_metric, None)
+    return selected_metrics
+
+def is_offseason(today):
+    # Season runs from 2nd week of March (≈ March 8) to 2nd week of June (≈ June 14)
+    season_start = date(today.year, 3, 10)   # adjust to your exact "second week" rule if needed
+    season_end   = date(today.year, 6, 14)
+    return not (season_start <= today <= season_end)
+
+HOME_TOP_N = 3
+TABLE_COLUMNS = ["Athlete", "Value", "Date"]
+
+def _home_bests(df, directions, metrics, top_n):
+    """Best `top_n` athletes per (metric label, gender, grade band) as Athlete/Value/Date rows.
+
+    Every cell comes out of one sort: rows are tagged with each label and
+    band they count for, reduced to each athlete's best (as rank_athletes()
+    picks it), then cut to the top N.
+    """
+    df = df[df["display_value"].notna() & df["gender"].isin(list(GENDER_LABELS))].reset_index(drop=True)
+    parts = []
+    for label in metrics:
+        rows = metric_rows(df, label)
+        for band, grades in GRADE_BANDS.items():
+            rows_in_band = rows.index[rows["grade"].isin(grades)] if grades else rows.index
+            parts.append(pd.DataFrame({"label": label, "band": band, "row": rows_in_band}))
+    tagged = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=["label", "band", "row"])
+    row = tagged["row"].to_numpy(dtype=int)
+    tagged["gender"] = df["gender"].to_numpy()[row]
+    # rank_athletes() groups athletes in category order and keeps the first of tied rows.
+    tagged["athlete"] = df["athlete_name"].cat.codes.to_numpy()[row]
+    tagged["score"] = _scores(df, directions).to_numpy()[row]
+    cell = ["label", "gender", "band"]
+    tagged = tagged.sort_values(["score", "row"], ascending=[False, True], kind="stable")
+    tagged = tagged.drop_duplicates(cell + ["athlete"])
+    tagged = tagged.sort_values(["score", "athlete"], ascending=[False, True], kind="stable")
+    top = tagged.groupby(cell, sort=False, observed=True).head(top_n)
+
+    best = df.iloc[top["row"].to_numpy()]
+    return pd.DataFrame({
+        **{c: top[c].to_numpy() for c in cell},
+        "Athlete": best["athlete_name"].astype(object).to_numpy(),
+        "Value": format_values(best),
+        "Date": best["date"].dt.strftime("%B-%Y").to_numpy(),
     })
-    if "date" in df_renamed.columns:
-        df_renamed["date"] = pd.to_datetime(df_renamed["date"]).dt.date
 
-    df_hash = hashlib.md5(pd.util.hash_pandas_object(df, index=True).values).hexdigest()[:8]
-    gender_suffix = f"-{gendered}" if gendered else ""
-    chart_key = f"chart-{label}{title_suffix}{gender_suffix}-{df_hash}"
-    table_key = f"table-{label}{title_suffix}{gender_suffix}-{df_hash}"
+class HomeSummary:
+    """Every table on Home for one data version and season year.
+
+    Built once (see home_summary()) from three grouped passes: all-time
+    leaders, the season's top performances and the latest week's
+    highlights. The page only looks cells up.
+    """
+
+    def __init__(self, data, pbs, directions, year):
+        self.year = year
+        season = data[data["year"] == year]
+        self.participation = participation(season)
+        self.consistency = consistency(season)
+        self.has_season = not season.empty
 
+        season_pbs = pbs[pbs["year"] == year]
+        self._top = {key: pd.DataFrame(rows, columns=TABLE_COLUMNS) for key, rows in
+                     self._cells(_home_bests(season_pbs, directions, HOME_METRICS, HOME_TOP_N)).items()}
+
+        recent = season.iloc[:0]
+        if self.has_season:
+            recent = season[season["week_number"] == season["week_number"].max()]
+        self.highlight_metrics = highlight_metrics(recent) if self.has_season else []
+
+        leaders = self._cells(_home_bests(pbs, directions, HOME_METRICS, 1))
+        highlights = self._cells(_home_bests(recent, directions, self.highlight_metrics, 1))
+        self._leaders, self._highlights = {}, {}
+        for gender in GENDER_LABELS:
+            for band in GRADE_BANDS:
+                self._leaders[gender, band] = self._leader_table(leaders, HOME_METRICS, gender, band)
+                self._highlights[gender, band] = self._leader_table(highlights, self.highlight_metrics, gender, band)
+
+    @staticmethod
+    def _cells(bests):
+        # Plain row lists per cell; building a frame per groupby slice costs more than the ranking.
+        cells = {}
+        for label, gender, band, *row in zip(*(bests[c].tolist() for c in ["label", "gender", "band", *TABLE_COLUMNS])):
+            cells.setdefault((label, gender, band), []).append(row)
+        return cells
+
+    @staticmethod
+    def _leader_table(cells, metrics, gender, band):
+        rows = []
+        for metric in metrics:
+            best = cells.get((metric, gender, band))
+            rows.append([metric, *best[0]] if best else [metric, "—", "—", "—"])
+        return pd.DataFrame(rows, columns=["Metric", *TABLE_COLUMNS])
+
+    def top(self, gender, band, metric):
+        """The season's top performances for one metric (empty if nobody qualifies)."""
+        return self._top.get((metric, gender, band), pd.DataFrame(columns=TABLE_COLUMNS))
+
+    def leaders(self, gender, band):
+        """All-time leader per HOME_METRICS metric, or dashes when nobody qualifies."""
+        return self._leaders[gender, band]
+
+    def highlights(self, gender, band):
+        """Leader per highlight metric in the season's latest week."""
+        return self._highlights[gender, band]
+
+@profiled(st.cache_resource(show_spinner=False, max_entries=4))
+def _home_summary(_data, version, year):
+    return HomeSummary(_data, personal_bests(_data), metric_directions(_data), year)
+
+def home_summary(data, year):
+    if using_sqlite():
+        return _sql_home_summary(data_version(), year)
+    return _home_summary(data, data_version(), year)
+
+# -------------------------------
+# Rendering
+# -------------------------------
+def lazy_tabs(labels, key):
+    """Tab-style selector that returns only the chosen label.
+
+    st.tabs runs every tab body on every rerun; with this the page computes
+    and ships only the view that is actually on screen.
+    """
+    labels = list(labels)
+    if not labels:
+        return None
+    return st.radio(key, labels, horizontal=True, key=key, label_visibility="collapsed")
+
+CHART_COLUMNS = ["athlete_name", "metric_name", "gender", "display_value", "input_value", "date"]
+
+# Built Vega-Lite specs keyed by board fingerprint; building and validating the
+# Altair chart is the expensive part of a rerun, so identical boards reuse it.
+_CHART_SPECS = LRUCache(128)
+
+def _fixed2(values):
+    return pd.Series(np.char.mod("%.2f", values.to_numpy(dtype=float)), index=values.index)
+
+def leaderboard_chart_spec(df, label, display_unit, input_unit):
+    """(Vega-Lite spec without data, chart rows) for one ranked board; the app and the static site share it."""
+    # Color mapping
     if "gender" in df.columns:
         color_scale = alt.Scale(domain=["M","F","Other"], range=["#89CFF0","#FFC0CB","#D3D3D3"])
     else:
         color_scale = alt.Scale(domain=["NA"], range=["#89CFF0"])
 
-    min_val = df["display_value"].min()
-    max_val = df["display_value"].max()
+    # Dynamic axis
+    min_val = float(df["display_value"].min())
+    max_val = float(df["display_value"].max())
     pad = (max_val - min_val) * 0.05 if max_val != min_val else 1
     axis_min = min_val - 3*pad
     axis_max = max_val + pad
 
-    df["bar_label"] = df.apply(
-        lambda row: f"{row['display_value']:.2f} {display_unit} ({row['input_value']:.2f} {input_unit})", axis=1
-    )
+    # Bar labels. Categoricals would ship their whole dictionary, so plain values go out.
+    df = df.astype({c: object for c in df.select_dtypes("category").columns}).assign(bar_label=(
+        _fixed2(df["display_value"]) + f" {display_unit} (" + _fixed2(df["input_value"]) + f" {input_unit})"
+    ))
 
+    # Base chart
     chart = alt.Chart(df).mark_bar(clip=True).encode(
         x=alt.X("display_value:Q", title=f"{label} ({display_unit})").scale(domain=(axis_min, axis_max)),
         y=alt.Y("athlete_name:N", sort=df["athlete_name"].tolist()),
@@ -141,6 +1966,7 @@ def render_chart(df, title_suffix="", gendered=False, label="Metric", unit="", i
         width="container"
     )
 
+    # Overlay text labels
     text = alt.Chart(df).mark_text(
         align="left", baseline="middle", dx=6, color="black"
     ).encode(
@@ -148,3 +1974,395 @@ def render_chart(df, title_suffix="", gendered=False, label="Metric", unit="", i
         y=alt.Y("athlete_name:N", sort=df["athlete_name"].tolist()),
         text="bar_label:N"
     )
+
+    # The rows travel separately (Streamlit ships them as Arrow), so only the
+    # encoding is kept in the cached spec.
+    spec = (chart + text).to_dict()
+    for key in ("config", "data", "datasets"):
+        spec.pop(key, None)
+    return spec, df
+
+def render_chart(df, title_suffix="", gendered=False, label="Metric", unit="", input_unit="", ascending=True):
+    df = df.sort_values("display_value", ascending=not ascending, kind="stable")
+    df = df[[c for c in CHART_COLUMNS if c in df.columns]].reset_index(drop=True)
+
+    # The fingerprint covers everything the chart shows, so it doubles as the
+    # widget key and the spec cache key.
+    df_hash = hashlib.md5(pd.util.hash_pandas_object(df, index=False).values).hexdigest()[:8]
+    gender_suffix = f"-{gendered}" if gendered else ""
+    chart_key = f"chart-{label}{title_suffix}{gender_suffix}-{df_hash}"
+    table_key = f"table-{label}{title_suffix}{gender_suffix}-{df_hash}"
+
+    spec_key = (df_hash, len(df), label, unit, input_unit)
+    cached = _CHART_SPECS.get(spec_key)
+    if cached is None:
+        with timed(f"chart build: {label}{title_suffix}"):
+            cached = _CHART_SPECS.put(spec_key, leaderboard_chart_spec(df, label, unit, input_unit))
+    spec, chart_data = cached
+
+    # Table renaming
+    df_renamed = df.rename(columns={
+        "display_value": f"Output ({unit})",
+        "input_value": f"Input ({input_unit})"
+    })
+    if "date" in df_renamed.columns:
+        df_renamed["date"] = pd.to_datetime(df_renamed["date"]).dt.date
+
+    # Streamlit layout
+    col1, col2 = st.columns([2,1])
+    with col1:
+        st.vega_lite_chart(chart_data, spec, use_container_width=True, key=chart_key)
+        record_payload("chart spec", chart_key, spec)
+        record_payload("chart data", chart_key, chart_data)
+    with col2:
+        display_cols = ["athlete_name", f"Output ({unit})", f"Input ({input_unit})", "date"]
+        existing_cols = [c for c in display_cols if c in df_renamed.columns]
+        table = df_renamed[existing_cols]
+        st.dataframe(table.style.format({
+            f"Output ({unit})": "{:.2f}",
+            f"Input ({input_unit})": "{:.2f}"
+        }), key=table_key)
+        record_payload("dataframe", table_key, table)
+
+def first_unit(units):
+    """The first unit in `units`, stripped ("" when missing)."""
+    unit = units.iloc[0]
+    return unit.strip() if pd.notna(unit) else ""
+
+def leaderboard_boards(rows, spec, directions, top_n, show_gender_split):
+    """(title suffix, ranked top-N board, gendered) for a view's composite and per-gender boards."""
+    gendered = "gender" in rows.columns
+    columns = ["athlete_name", "display_value", "input_value", "date", "gender"]
+    if spec.metric is None:
+        columns.append("metric_name")
+    columns = [c for c in columns if c in rows.columns]
+
+    boards = [("-composite", rows, gendered)]
+    if show_gender_split and gendered:
+        boards += [(f"-{g}", rows[rows["gender"] == g], True) for g in sorted(rows["gender"].dropna().unique())]
+    return [(suffix, rank_athletes(board_rows, directions, top_n=top_n)[columns], board_gendered)
+            for suffix, board_rows, board_gendered in boards]
+
+def render_leaderboard(rows, spec, directions, top_n, show_gender_split):
+    """Composite leaderboard for a view plus one board per gender."""
+    if rows.empty:
+        st.info(f"No data for {spec.label}.")
+        return
+
+    unit = first_unit(rows["display_unit"])
+    input_unit = first_unit(rows["input_unit"])
+    ascending = directions[rows["metric_name"].iloc[0]] == "max"
+
+    for title_suffix, board, board_gendered in leaderboard_boards(rows, spec, directions, top_n, show_gender_split):
+        render_chart(board, title_suffix=title_suffix, gendered=board_gendered, label=spec.label,
+                     unit=unit, input_unit=input_unit, ascending=ascending)
+
+PROGRESSION_MODES = ["Auto", "All attempts", "Weekly summary"]
+PROGRESSION_RAW_LIMIT = 1500     # "Auto" switches to the summary above this many attempts
+PROGRESSION_SAMPLE_CAP = 400     # most points the summary scatter ever ships
+
+def weekly_quantiles(df):
+    """min/q1/median/q3/max and attempt count of display_value per week_number."""
+    values = df["display_value"].astype("float64").groupby(df["week_number"], observed=True)
+    quartiles = values.quantile([0.25, 0.5, 0.75]).unstack()
+    quartiles.columns = ["q1", "median", "q3"]
+    return pd.concat([values.min().rename("min"), quartiles, values.max().rename("max"),
+                      values.size().rename("n")], axis=1).reset_index()
+
+def weekly_sample(df, directions, cap=PROGRESSION_SAMPLE_CAP):
+    """Each athlete's best attempt per week, thinned evenly to at most `cap` points."""
+    best = rank_athletes(df, directions, by=("athlete_name", "year", "week_number"))
+    best = best.sort_values(["week_number", "athlete_name", "year"], kind="stable")
+    if len(best) > cap:
+        best = best.iloc[np.linspace(0, len(best) - 1, cap).round().astype(int)]
+    return best
+
+def _progression_scatter(df, y_domain):
+    # Weeks are jittered by the per-row offset from normalization; only the
+    # plotted columns are shipped
+    df = df[["athlete_name", "metric_name", "week_number", "display_value", "year"]].assign(
+        week_jitter=df["week_number"].astype("float64") + df["jitter"]
+    )
+    return alt.Chart(df).mark_point(filled=True, size=80, opacity=0.75).encode(
+        x=alt.X("week_jitter:Q", title="Week",
+                scale=alt.Scale(zero=False),
+                axis=alt.Axis(values=sorted(df["week_number"].unique()))),
+        y=alt.Y("display_value:Q", title="Value",
+                scale=alt.Scale(domain=y_domain)),
+        color=alt.Color("athlete_name:N",
+                        legend=alt.Legend(title="Athlete"),
+                        scale=alt.Scale(scheme="turbo")),
+        shape=alt.Shape("year:N", legend=alt.Legend(title="Year")),
+        tooltip=[
+            alt.Tooltip('athlete_name:N', title='Athlete'),
+            alt.Tooltip('metric_name:N', title='Metric'),
+            alt.Tooltip('week_number:Q', title='Week'),
+            alt.Tooltip('display_value:Q', title='Value', format=".3f"),
+            alt.Tooltip('year:O', title='Year')
+        ]
+    )
+
+def _value_domain(low, high):
+    pad = (high - low) * 0.05 if high != low else 1
+    return (low - pad, high + pad)
+
+def raw_progression_chart(team_df):
+    """Box plots per week with every attempt as a point."""
+    y_domain = _value_domain(team_df["display_value"].min(), team_df["display_value"].max())
+    values = team_df[["week_number", "display_value"]]
+
+    box = alt.Chart(values).mark_boxplot(extent=1, size=55, opacity=0.4, clip=True).encode(
+        x=alt.X("week_number:Q", title="Week",
+                scale=alt.Scale(zero=False)),
+        y=alt.Y("display_value:Q", title="Value",
+                scale=alt.Scale(domain=y_domain)),
+        color=alt.value("gray")
+    )
+    scatter = _progression_scatter(team_df, y_domain)
+
+    if len(team_df) >= 5:
+        iqr_band = alt.Chart(values).mark_errorband(extent='iqr', color='darkgray', opacity=0.2).encode(
+            x="week_number:Q", y="display_value:Q"
+        )
+        return box + iqr_band + scatter
+    return box + scatter
+
+def summary_progression_chart(team_df, directions):
+    """Per-week quantile boxes plus a capped sample of each athlete's weekly best."""
+    # Box statistics are computed here, so the browser only receives one row
+    # per week plus a capped sample of points instead of every attempt.
+    stats = weekly_quantiles(team_df)
+    sample = weekly_sample(team_df, directions)
+    y_domain = _value_domain(stats["min"].min(), stats["max"].max())
+
+    base = alt.Chart(stats).encode(
+        x=alt.X("week_number:Q", title="Week", scale=alt.Scale(zero=False))
+    )
+    y = alt.Y("min:Q", title="Value", scale=alt.Scale(domain=y_domain))
+    tooltip = [
+        alt.Tooltip("week_number:Q", title="Week"),
+        alt.Tooltip("n:Q", title="Attempts"),
+        *[alt.Tooltip(f"{c}:Q", title=c.title(), format=".3f") for c in ["min", "q1", "median", "q3", "max"]],
+    ]
+    whiskers = base.mark_rule(color="gray", opacity=0.4, clip=True).encode(y=y, y2="max:Q")
+    boxes = base.mark_bar(size=55, color="gray", opacity=0.4, clip=True).encode(
+        y=alt.Y("q1:Q", scale=alt.Scale(domain=y_domain)), y2="q3:Q", tooltip=tooltip
+    )
+    medians = base.mark_tick(size=55, color="white", thickness=2, clip=True).encode(
+        y=alt.Y("median:Q", scale=alt.Scale(domain=y_domain))
+    )
+    layers = [whiskers, boxes, medians]
+    if stats["n"].sum() >= 5:
+        layers.append(base.mark_area(color="darkgray", opacity=0.2).encode(
+            y=alt.Y("q1:Q", scale=alt.Scale(domain=y_domain)), y2="q3:Q"
+        ))
+    return alt.layer(*layers, _progression_scatter(sample, y_domain))
+
+def render_progression(rows, spec, key, directions, mode="Auto"):
+    """Weekly team scatter with box plots for one view, one gender at a time.
+
+    "Weekly summary" aggregates in pandas and ships per-week quantiles plus a
+    capped sample; "Auto" picks it once a view has more attempts than
+    PROGRESSION_RAW_LIMIT.
+    """
+    if rows.empty:
+        st.info(f"No data for {spec.label}.")
+        return
+
+    g = lazy_tabs(sorted(rows["gender"].dropna().unique()), key=f"{key}-gender")
+    team_df = rows[rows["gender"] == g]
+    team_df = team_df[team_df["display_value"].notna() & team_df["week_number"].notna()]
+    if team_df.empty:
+        st.info(f"No data for {spec.label}.")
+        return
+
+    if mode == "Auto":
+        mode = "Weekly summary" if len(team_df) > PROGRESSION_RAW_LIMIT else "All attempts"
+    with timed(f"progression chart build ({mode})"):
+        if mode == "Weekly summary":
+            chart = summary_progression_chart(team_df, directions)
+            st.caption(f"Weekly quantiles over {len(team_df)} attempts; points are each athlete's best per week.")
+        else:
+            chart = raw_progression_chart(team_df)
+        chart = chart.properties(width='container', height=600)
+    st.altair_chart(chart, use_container_width=True)
+    record_payload("chart", f"progression-{spec.label}-{g}", chart)
+
+def render_athlete_progression(series, athlete, metric, filters=None):
+    """One athlete's session bests for a metric with running best, rolling mean and gap to the best shown.
+
+    `filters` limits the sessions shown (see AthleteSeries.get); the best and
+    the "vs best" column are then over those sessions only.
+    """
+    everything = series.get(athlete, metric)
+    df = everything if filters is None else series.get(athlete, metric, filters)
+    if df.empty:
+        st.info(f"No sessions for {athlete} in {metric} with current filters.")
+        return
+
+    unit = first_unit(df["display_unit"])
+    values = df["display_value"].astype("float64")
+    sign = -1.0 if series.directions.get(metric) == "min" else 1.0
+    best = (values * sign).max() * sign
+    vs_best = (values / best - 1.0) * 100.0
+    filtered = len(df) < len(everything)
+    if filtered:
+        st.caption(f"{len(df)} of {len(everything)} sessions match the filters; best to date and the "
+                   f"{series.window}-session mean also count the others.")
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Best in selection" if filtered else "Personal best", f"{best:.2f} {unit}")
+    col2.metric("Latest session", f"{values.iloc[-1]:.2f} {unit}")
+    col3.metric("Latest vs best", f"{vs_best.iloc[-1]:+.1f}%")
+
+    lines = df.melt(
+        id_vars=["date"], value_vars=["display_value", "rolling_best", "rolling_mean"],
+        var_name="series", value_name="value",
+    )
+    lines["series"] = lines["series"].map({
+        "display_value": "Session best", "rolling_best": "Best to date",
+        "rolling_mean": f"{series.window}-session mean",
+    })
+    chart = alt.Chart(lines).mark_line(point=True).encode(
+        x=alt.X("date:T", title="Date"),
+        y=alt.Y("value:Q", title=f"{metric} ({unit})", scale=alt.Scale(zero=False)),
+        color=alt.Color("series:N", legend=alt.Legend(title=None)),
+        strokeDash=alt.condition(alt.datum.series == "Session best", alt.value([1, 0]), alt.value([4, 3])),
+        tooltip=[
+            alt.Tooltip("date:T", title="Date"),
+            alt.Tooltip("series:N", title="Series"),
+            alt.Tooltip("value:Q", title="Value", format=".2f"),
+        ]
+    ).properties(width='container', height=400)
+    st.altair_chart(chart, use_container_width=True)
+    record_payload("chart", f"athlete-{athlete}-{metric}", chart)
+
+    table = df[["date", "display_value", "rolling_best", "rolling_mean"]].assign(vs_best=vs_best).rename(columns={
+        "display_value": f"Session best ({unit})", "rolling_best": "Best to date",
+        "rolling_mean": f"{series.window}-session mean", "vs_best": "vs best (%)",
+    })
+    table["date"] = table["date"].dt.date
+    st.dataframe(table.iloc[::-1].style.format(precision=2), hide_index=True, use_container_width=True)
+    record_payload("dataframe", f"athlete-{athlete}-{metric}", table)
+
+# -------------------------------
+# Export
+# -------------------------------
+# `python -m utils export` writes every leaderboard and the record table as
+# static files, so they can be published without a running app.
+EXPORT_FORMATS = ["json", "csv", "html"]
+EXPORT_DIR = BASE_DIR / "export"
+BOARD_LABELS = {"composite": "All", **GENDER_LABELS}
+
+def export_tables(data, top_n=10, filters=None):
+    """Every leaderboard (long format, one row per ranked athlete) and the per-metric records."""
+    pbs = personal_bests(data, filters)
+    dims = metric_dimensions(data)
+    directions = dims["direction"]
+
+    boards = []
+    for category, families in build_views(pbs).items():
+        for family_label, leaves in families.items():
+            for spec in leaves:
+                rows = view_rows(pbs, spec, dims)
+                if rows.empty:
+                    continue
+                unit = first_unit(rows["display_unit"])
+                for suffix, board, _ in leaderboard_boards(rows, spec, directions, top_n, True):
+                    board_key = suffix.lstrip("-")
+                    if "metric_name" not in board.columns:
+                        board = board.assign(metric_name=spec.metric)
+                    boards.append(board.assign(
+                        category=category, family=family_label or "", view=spec.label,
+                        board=BOARD_LABELS.get(board_key, board_key), rank=np.arange(1, len(board) + 1),
+                        display_unit=unit,
+                    ))
+    view_columns = ["category", "family", "view", "board", "rank"]
+    leaderboards = pd.concat(boards, ignore_index=True) if boards else pd.DataFrame(columns=view_columns)
+    leaderboards = leaderboards[view_columns + [c for c in leaderboards.columns if c not in view_columns]]
+
+    records = rank_athletes(pbs, directions, by=("metric_name", "gender"))
+    records = records.sort_values(["metric_category", "metric_name", "gender"], kind="stable")
+    records = records[[c for c in ["metric_category", "metric_name", "gender", "athlete_name", "display_value",
+                                   "display_unit", "input_value", "input_unit", "grade", "date"]
+                       if c in records.columns]].reset_index(drop=True)
+    return {"leaderboards": leaderboards, "records": records}
+
+def plain_frame(df):
+    """Object/str columns and ISO dates, so every writer sees the same values."""
+    out = df.astype({c: object for c in df.select_dtypes("category").columns})
+    for col in out.select_dtypes("datetime").columns:
+        out[col] = out[col].dt.strftime("%Y-%m-%d")
+    return out
+
+def write_export(tables, out_dir=EXPORT_DIR, formats=EXPORT_FORMATS):
+    """Write `tables` as <name>.json/.csv plus one index.html; returns the paths written."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    written = []
+    plain = {name: plain_frame(df) for name, df in tables.items()}
+    for name, df in plain.items():
+        if "json" in formats:
+            path = out_dir / f"{name}.json"
+            df.to_json(path, orient="records", indent=1, double_precision=4)
+            written.append(path)
+        if "csv" in formats:
+            path = out_dir / f"{name}.csv"
+            df.to_csv(path, index=False, float_format="%.2f")
+            written.append(path)
+    if "html" in formats:
+        path = out_dir / "index.html"
+        path.write_text(_export_html(plain), encoding="utf-8")
+        written.append(path)
+    return written
+
+def _export_html(tables):
+    parts = ["<!doctype html>", "<html><head><meta charset='utf-8'><title>LCA Speed Journal</title></head><body>"]
+    records = tables.get("records")
+    if records is not None:
+        parts += ["<h1>Records</h1>", records.to_html(index=False, float_format="%.2f", na_rep="")]
+    boards = tables.get("leaderboards")
+    if boards is not None and not boards.empty:
+        parts.append("<h1>Leaderboards</h1>")
+        for (category, family, view, board), df in boards.groupby(
+                ["category", "family", "view", "board"], sort=False):
+            title = " / ".join(p for p in [category, family, view] if p)
+            shown = df.drop(columns=["category", "family", "view", "board"])
+            parts += [f"<h2>{html.escape(title)} ({html.escape(board)})</h2>", shown.to_html(index=False, float_format="%.2f", na_rep="")]
+    parts.append("</body></html>")
+    return "\n".join(parts)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m utils")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="Write all leaderboards and records as static files.")
+    export.add_argument("--out", default=EXPORT_DIR, type=Path, help="Output directory (default: export/).")
+    export.add_argument("--format", dest="formats", nargs="+", choices=EXPORT_FORMATS, default=EXPORT_FORMATS)
+    export.add_argument("--top-n", type=int, default=10, help="Entries per leaderboard.")
+    export.add_argument("--year", dest="years", type=int, nargs="*", default=[])
+    export.add_argument("--grade", dest="grades", type=int, nargs="*", default=[])
+    export.add_argument("--gender", dest="genders", nargs="*", default=[], choices=list(GENDER_LABELS))
+
+    commands.add_parser("validate", help="Check the session files against the README schema.")
+
+    args = parser.parse_args(argv)
+    st.logger.set_log_level("error")   # no Streamlit runtime here; its caches still work
+    data, files = load_all_sessions()
+    if args.command == "validate":
+        issues = session_issues()
+        for name, report in issues.groupby("file", sort=False):
+            print(f"{name}: {len(report)} problem(s)")
+            print(report.drop(columns="file").to_string(index=False), end="\n\n")
+        print(f"{len(files)} file(s), {len(data)} rows, {len(issues)} problem(s)")
+        raise SystemExit(1 if len(issues) else 0)
+    if data.empty:
+        parser.error(f"No session data found under {DATA_DIR}")
+
+    filters = Filters(args.top_n, args.years, [], [], [], args.grades,
+                      filter_engine(data).week_extent, True, args.genders)
+    for path in write_export(export_tables(data, args.top_n, filters), args.out, args.formats):
+        print(path)
+
+if __name__ == "__main__":
+    main()